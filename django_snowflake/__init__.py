@@ -9,3 +9,11 @@ check_django_compatability()
 from .functions import register_functions  # noqa
 
 register_functions()
+
+from .lookups import register_lookups  # noqa
+
+register_lookups()
+
+from .tables import register_options  # noqa
+
+register_options()
@@ -0,0 +1,95 @@
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+
+try:
+    import pyarrow
+    import pyarrow.compute
+except ImportError:
+    pyarrow = None
+
+
+def check_pyarrow(feature):
+    if pyarrow is None:
+        raise ImproperlyConfigured(
+            '%s requires pyarrow. Install it with: '
+            'pip install "snowflake-connector-python[pandas]"' % feature
+        )
+
+
+def column_to_pylist(column):
+    """
+    Convert an Arrow column to a list of the Python types returned by the
+    connector's row-at-a-time path (and thus expected by Django's
+    converters).
+    """
+    types = pyarrow.types
+    data_type = column.type
+    # Nanosecond values can't be represented by datetime.datetime and
+    # datetime.time.
+    if types.is_timestamp(data_type) and data_type.unit == 'ns':
+        column = column.cast(pyarrow.timestamp('us', data_type.tz), safe=False)
+    elif types.is_time64(data_type) and data_type.unit == 'ns':
+        column = column.cast(pyarrow.time64('us'), safe=False)
+    elif types.is_decimal(data_type) and data_type.scale == 0:
+        # NUMBER(p,0) is an integer, not a Decimal.
+        if data_type.precision <= 18:
+            column = column.cast(pyarrow.int64())
+        else:
+            return [None if value is None else int(value) for value in column.to_pylist()]
+    return column.to_pylist()
+
+
+def table_to_rows(table):
+    """Convert an Arrow table to a list of row tuples, a column at a time."""
+    return list(zip(*(column_to_pylist(column) for column in table.columns)))
+
+
+def convert_column(column, internal_type, connection):
+    """
+    Convert an Arrow column to the type of a model field (given by its
+    internal type) with Arrow compute functions, the vectorized equivalent of
+    the field's database converters.
+    """
+    types = pyarrow.types
+    data_type = column.type
+    if internal_type in connection.ops.integer_field_ranges:
+        # The connector uses the smallest integer type that fits each batch.
+        if types.is_integer(data_type) or types.is_decimal(data_type):
+            return column.cast(pyarrow.int64())
+    elif internal_type == 'DurationField':
+        # Durations are stored as microseconds.
+        if types.is_integer(data_type) or types.is_decimal(data_type):
+            return column.cast(pyarrow.int64()).cast(pyarrow.duration('us'))
+    elif internal_type == 'DateTimeField':
+        if types.is_timestamp(data_type) and data_type.tz is not None:
+            if settings.USE_TZ:
+                return column.cast(pyarrow.timestamp(data_type.unit, 'UTC'))
+            # Naive datetimes in the current time zone, as with
+            # DatabaseOperations.convert_datetimefield_value().
+            current_timezone = pyarrow.timestamp(data_type.unit, timezone.get_current_timezone_name())
+            return pyarrow.compute.local_timestamp(column.cast(current_timezone))
+    elif internal_type == 'UUIDField':
+        # Format the hex stored in VARCHAR(32) like str(uuid.UUID()).
+        if types.is_string(data_type):
+            parts = [
+                pyarrow.compute.utf8_slice_codeunits(column, start, stop)
+                for start, stop in ((0, 8), (8, 12), (12, 16), (16, 20), (20, 32))
+            ]
+            return pyarrow.compute.binary_join_element_wise(*parts, '-')
+    return column
+
+
+def convert_table(table, names, internal_types, connection):
+    """
+    Convert the columns of a query's Arrow table (or None if the query didn't
+    return any rows) to the types of its fields and name them.
+    """
+    if table is None:
+        columns = [pyarrow.array([], pyarrow.null()) for name in names]
+    else:
+        columns = [
+            convert_column(column, internal_type, connection)
+            for column, internal_type in zip(table.columns, internal_types)
+        ]
+    return pyarrow.Table.from_arrays(columns, names=names)
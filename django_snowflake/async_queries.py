@@ -0,0 +1,165 @@
+import asyncio
+import functools
+import threading
+
+import snowflake.connector as Database
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .timeouts import DatabaseErrorWrapper, QueryTimeout
+
+# {database alias: AsyncConnection}
+async_connections = {}
+async_connections_lock = threading.Lock()
+
+
+def get_async_connection(alias=DEFAULT_DB_ALIAS):
+    """
+    Return the AsyncConnection for a database alias. It's shared by all
+    coroutines since a Snowflake session can run many async queries at once.
+    """
+    with async_connections_lock:
+        if alias not in async_connections:
+            async_connections[alias] = AsyncConnection(connections[alias])
+        return async_connections[alias]
+
+
+async def close_async_connections():
+    with async_connections_lock:
+        connections_to_close = list(async_connections.values())
+        async_connections.clear()
+    for connection in connections_to_close:
+        await connection.close()
+
+
+class AsyncConnection:
+    """
+    Run queries from an event loop with Snowflake's asynchronous queries:
+    each query is submitted with execute_async() and then polled with
+    asyncio.sleep() between status checks, so a coroutine waiting for a
+    query doesn't hold a thread. The short calls to the connector (submit,
+    status, and fetching results) run in the event loop's default executor.
+
+    `wrapper` is the DatabaseWrapper whose settings are used to connect.
+    Alternatively, `connection` may be an already connected connector
+    connection (or a fake one, for tests), which can't be replaced if it
+    breaks.
+    """
+    # For DatabaseErrorWrapper.
+    Database = Database
+    errors_occurred = False
+
+    def __init__(self, wrapper=None, connection=None, poll_interval=0.5, min_poll_interval=0.05):
+        self.wrapper = wrapper
+        self.connection = connection
+        self.poll_interval = poll_interval
+        self.min_poll_interval = min_poll_interval
+        self.connect_lock = threading.Lock()
+        self.wrap_database_errors = DatabaseErrorWrapper(self)
+
+    async def run(self, func, *args, **kwargs):
+        """Run a blocking connector call in the default executor."""
+        loop = asyncio.get_running_loop()
+        with self.wrap_database_errors:
+            return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+    def _connect(self):
+        with self.connect_lock:
+            if self.connection is None:
+                pool = self.wrapper.pool
+                if pool is None:
+                    self.connection = Database.connect(**self.wrapper.get_connection_params())
+                else:
+                    self.connection, self.session_parameters = pool.acquire()
+                self.errors_occurred = False
+            return self.connection
+
+    def is_usable(self, connection):
+        if connection.is_closed():
+            return False
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except Database.Error:
+            return False
+        return True
+
+    async def ensure_connection(self):
+        connection = self.connection
+        if connection is not None and self.errors_occurred:
+            # As with Django's close_if_unusable_or_obsolete(), replace the
+            # session if it's broken (e.g. expired) after an error rather
+            # than failing every later query.
+            if await self.run(self.is_usable, connection):
+                self.errors_occurred = False
+            elif self.connection is connection and self.wrapper is not None:
+                await self.close()
+        if self.connection is None:
+            return await self.run(self._connect)
+        return self.connection
+
+    async def submit(self, sql, params=None):
+        """Submit a query without waiting for it. Return its query ID."""
+        connection = await self.ensure_connection()
+
+        def execute_async():
+            with connection.cursor() as cursor:
+                cursor.execute_async(sql, params)
+                return cursor.sfqid
+        return await self.run(execute_async)
+
+    async def wait(self, sfqid):
+        """Wait for a query to finish, raising an exception if it failed."""
+        connection = await self.ensure_connection()
+        interval = self.min_poll_interval
+        while True:
+            status = await self.run(connection.get_query_status_throw_if_error, sfqid)
+            if not connection.is_still_running(status):
+                return
+            await asyncio.sleep(interval)
+            interval = min(interval * 2, self.poll_interval)
+
+    async def fetch(self, sfqid):
+        """Return the rows of a finished query."""
+        connection = await self.ensure_connection()
+
+        def fetchall():
+            with connection.cursor() as cursor:
+                cursor.get_results_from_sfqid(sfqid)
+                return cursor.fetchall()
+        return await self.run(fetchall)
+
+    async def execute(self, sql, params=None, timeout=None):
+        """
+        Execute a query and return its rows. If it doesn't finish within
+        `timeout` seconds, cancel it and raise QueryTimeout.
+        """
+        sfqid = await self.submit(sql, params)
+        try:
+            await asyncio.wait_for(self.wait(sfqid), timeout)
+        except asyncio.TimeoutError:
+            await self.cancel(sfqid)
+            raise QueryTimeout(
+                'Query %s timed out after %s seconds and was canceled.' % (sfqid, timeout), query_id=sfqid,
+            )
+        except asyncio.CancelledError:
+            await self.cancel(sfqid)
+            raise
+        return await self.fetch(sfqid)
+
+    async def cancel(self, sfqid):
+        connection = await self.ensure_connection()
+
+        def cancel_query():
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT SYSTEM$CANCEL_QUERY(%s)', [sfqid])
+        await self.run(cancel_query)
+
+    async def close(self):
+        if self.connection is None:
+            return
+        connection, self.connection = self.connection, None
+        pool = self.wrapper.pool if self.wrapper is not None else None
+        if pool is not None:
+            pool.release(connection, self.session_parameters, discard=self.errors_occurred)
+        else:
+            await self.run(connection.close)
@@ -1,6 +1,9 @@
+from contextlib import contextmanager
+
 from django.core.exceptions import ImproperlyConfigured
 from django.db.backends.base.base import BaseDatabaseWrapper
 from django.utils.asyncio import async_unsafe
+from django.utils.functional import cached_property
 
 try:
     import snowflake.connector as Database
@@ -8,12 +11,22 @@ except ImportError as e:
     raise ImproperlyConfigured("Error loading snowflake connector module: %s" % e)
 
 # Some of these import snowflake connector, so import them after checking if it's installed.
+from .arrow import check_pyarrow                            # NOQA isort:skip
+from .cache import get_cache                                # NOQA isort:skip
 from .client import DatabaseClient                          # NOQA isort:skip
 from .creation import DatabaseCreation                      # NOQA isort:skip
+from .cursor import (                                       # NOQA isort:skip
+    ArrowCursor, CachingCursor, PrefetchingCursor, TelemetryCursor,
+    WarehouseCursor,
+)
 from .features import DatabaseFeatures                      # NOQA isort:skip
 from .introspection import DatabaseIntrospection            # NOQA isort:skip
 from .operations import DatabaseOperations                  # NOQA isort:skip
+from .pool import get_pool                                  # NOQA isort:skip
 from .schema import DatabaseSchemaEditor                    # NOQA isort:skip
+from .sequences import PrimaryKeyAllocator                  # NOQA isort:skip
+from .timeouts import DatabaseErrorWrapper                  # NOQA isort:skip
+from .warehouses import Warehouse, get_warehouses           # NOQA isort:skip
 
 
 class DatabaseWrapper(BaseDatabaseWrapper):
@@ -48,11 +61,7 @@ class DatabaseWrapper(BaseDatabaseWrapper):
         'TimeField': 'TIME',
         'UUIDField': 'VARCHAR(32)',
     }
-    data_types_suffix = {
-        'AutoField': 'AUTOINCREMENT',
-        'BigAutoField': 'AUTOINCREMENT',
-        'SmallAutoField': 'AUTOINCREMENT',
-    }
+    auto_field_types = {'AutoField', 'BigAutoField', 'SmallAutoField'}
     operators = {
         'exact': '= %s',
         'iexact': "ILIKE %s ESCAPE '\\\\'",
@@ -89,6 +98,40 @@ class DatabaseWrapper(BaseDatabaseWrapper):
 
     settings_is_missing = "settings.DATABASES is missing '%s' for 'django_snowflake'."
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # A stack of the options passed to execution_options().
+        self.execution_options_stack = []
+        self.connection_session_parameters = {}
+        # The ID of the last query executed by a cursor.
+        self.last_query_id = None
+        # The name of the connection's warehouse, if known.
+        self.current_warehouse = None
+        # The tables modified by the current transaction (None if unknown)
+        # whose RESULT_CACHE entries are invalidated when it commits.
+        self.uncommitted_written_tables = set()
+
+    @cached_property
+    def data_types_suffix(self):
+        # When primary keys are allocated from sequences,
+        # DatabaseSchemaEditor.column_sql() adds "DEFAULT <sequence>.NEXTVAL"
+        # to AutoFields instead.
+        if self.pk_allocator:
+            return {}
+        return {field_type: 'AUTOINCREMENT' for field_type in self.auto_field_types}
+
+    @cached_property
+    def pk_allocator(self):
+        block_size = self.settings_dict.get('PK_ALLOCATION_BLOCK_SIZE')
+        return PrimaryKeyAllocator(self, block_size) if block_size else None
+
+    @cached_property
+    def result_cache(self):
+        options = self.settings_dict.get('RESULT_CACHE')
+        if not options:
+            return None
+        return get_cache(self.alias, {} if options is True else options)
+
     def get_connection_params(self):
         settings_dict = self.settings_dict
         conn_params = {
@@ -115,7 +158,7 @@ class DatabaseWrapper(BaseDatabaseWrapper):
             raise ImproperlyConfigured(self.settings_is_missing % 'ACCOUNT')
 
         if settings_dict.get('WAREHOUSE'):
-            conn_params['warehouse'] = self.ops.quote_name(settings_dict['WAREHOUSE'])
+            conn_params['warehouse'] = self.ops.quote_name(self.default_warehouse.name)
         else:
             raise ImproperlyConfigured(self.settings_is_missing % 'WAREHOUSE')
 
@@ -124,39 +167,256 @@ class DatabaseWrapper(BaseDatabaseWrapper):
         else:
             raise ImproperlyConfigured(self.settings_is_missing % 'SCHEMA')
 
+        if settings_dict.get('ARROW_RESULTS'):
+            check_pyarrow("The 'ARROW_RESULTS' setting")
+        result_cache_options = settings_dict.get('RESULT_CACHE')
+        if isinstance(result_cache_options, dict) and result_cache_options.get('DIRECTORY'):
+            check_pyarrow("The 'RESULT_CACHE' setting's 'DIRECTORY'")
+
+        # Set session parameters when connecting rather than with additional
+        # queries in init_connection_state().
+        conn_params['session_parameters'] = {
+            name.upper(): value for name, value in (
+                *conn_params.get('session_parameters', {}).items(),
+                *settings_dict.get('SESSION_PARAMETERS', {}).items(),
+            )
+        }
+        conn_params['session_parameters']['AUTOCOMMIT'] = settings_dict['AUTOCOMMIT']
+        if self.timezone_name:
+            conn_params['session_parameters']['TIMEZONE'] = self.timezone_name
+
         return conn_params
 
+    @property
+    def pool(self):
+        """The ConnectionPool used by this connection, if 'POOL' is set."""
+        options = self.settings_dict.get('POOL')
+        if not options:
+            return None
+        return get_pool(self.get_connection_params(), {} if options is True else options)
+
     @async_unsafe
     def get_new_connection(self, conn_params):
-        return Database.connect(**conn_params)
+        pool = self.pool
+        if pool is None:
+            connection = Database.connect(**conn_params)
+            session_parameters = conn_params['session_parameters']
+        else:
+            connection, session_parameters = pool.acquire()
+        # A pooled connection may have been switched to another warehouse.
+        self.current_warehouse = self.default_warehouse.name if pool is None else None
+        # The session parameters of the connection, kept up to date by
+        # ensure_timezone() and _set_autocommit().
+        self.connection_session_parameters = dict(session_parameters)
+        # Whether the session has the file format of ensure_stage_file_format().
+        self.has_stage_file_format = False
+        return connection
 
     def ensure_timezone(self):
         if self.connection is None:
             return False
-        with self.connection.cursor() as cursor:
-            conn_timezone_name = cursor.execute("SHOW PARAMETERS LIKE 'TIMEZONE'").fetchone()[1]
         timezone_name = self.timezone_name
-        if timezone_name and conn_timezone_name != timezone_name:
+        if timezone_name and self.connection_session_parameters.get('TIMEZONE') != timezone_name:
             with self.connection.cursor() as cursor:
                 cursor.execute("ALTER SESSION SET TIMEZONE=%s", [timezone_name])
+            self.connection_session_parameters['TIMEZONE'] = timezone_name
             return True
         return False
 
     def init_connection_state(self):
-        timezone_changed = self.ensure_timezone()
-        if timezone_changed:
-            # Commit after setting the time zone (see #17062)
-            # (This is copied from the postgresql backend.)
-            if not self.get_autocommit():
-                self.connection.commit()
+        # The time zone and the other session parameters are set when
+        # connecting (see get_connection_params()), so this only runs a query
+        # if a pooled connection was released with a different time zone.
+        self.ensure_timezone()
+
+    def ensure_stage_file_format(self):
+        """
+        Create the temporary file format with which staged files are queried
+        (see SQLInsertCompiler.execute_staged_merge()) unless the session
+        already has it. Return False if it doesn't exist and can't be created
+        because DDL would commit the transaction of the atomic block.
+        """
+        self.ensure_connection()
+        if self.has_stage_file_format:
+            return True
+        if self.in_atomic_block:
+            return False
+        with self.cursor() as cursor:
+            cursor.execute('CREATE TEMPORARY FILE FORMAT IF NOT EXISTS %s %s' % (
+                self.ops.stage_file_format_name, self.ops.stage_file_format,
+            ))
+        self.has_stage_file_format = True
+        return True
+
+    @cached_property
+    def settings_query_tag(self):
+        """The QUERY_TAG set when connecting, if any."""
+        return self.get_connection_params()['session_parameters'].get('QUERY_TAG')
+
+    @cached_property
+    def wrap_database_errors(self):
+        # Raise QueryTimeout for statements canceled by a timeout.
+        return DatabaseErrorWrapper(self)
+
+    @cached_property
+    def warehouses(self):
+        return get_warehouses(self.settings_dict)
+
+    @cached_property
+    def default_warehouse(self):
+        """
+        The 'WAREHOUSE' setting, which may be the name of one of the
+        'WAREHOUSES'.
+        """
+        name = self.settings_dict['WAREHOUSE']
+        return self.warehouses.get(name) or Warehouse(None, name)
+
+    def get_warehouse(self, name):
+        try:
+            return self.warehouses[name]
+        except KeyError:
+            raise ValueError(
+                "Unknown warehouse %r. Add it to the 'WAREHOUSES' setting of the %r database." % (name, self.alias)
+            )
+
+    def warehouse_options(self, name):
+        """Return the execution_options() that select the named warehouse."""
+        warehouse = self.get_warehouse(name)
+        options = {'warehouse': name}
+        if warehouse.queued_timeout is not None:
+            options['session_parameters'] = {'STATEMENT_QUEUED_TIMEOUT_IN_SECONDS': warehouse.queued_timeout}
+        return options
+
+    @property
+    def selected_warehouse(self):
+        """The Warehouse on which queries are currently executed."""
+        name = self.current_execution_options.get('warehouse')
+        return self.default_warehouse if name is None else self.warehouses[name]
+
+    def use_warehouse(self, warehouse):
+        """Switch the connection's session to the given Warehouse."""
+        with self.connection.cursor() as cursor:
+            cursor.execute('USE WAREHOUSE %s' % self.ops.quote_name(warehouse.name))
+        self.current_warehouse = warehouse.name
 
     @async_unsafe
     def create_cursor(self, name=None):
-        return self.connection.cursor()
+        cursor = self.connection.cursor()
+        if self.warehouses:
+            cursor = WarehouseCursor(cursor, self)
+        cursor = TelemetryCursor(cursor, self)
+        if self.settings_dict.get('ARROW_RESULTS'):
+            cursor = ArrowCursor(cursor)
+        if self.result_cache is not None:
+            cursor = CachingCursor(cursor, self.result_cache, self)
+        if name == 'chunked':
+            prefetch_chunks = self.current_execution_options.get(
+                'prefetch_chunks', self.settings_dict.get('PREFETCH_CHUNKS'),
+            )
+            if prefetch_chunks:
+                cursor = PrefetchingCursor(cursor, prefetch_chunks)
+        return cursor
+
+    def chunked_cursor(self):
+        return self._cursor(name='chunked')
+
+    @property
+    def current_execution_options(self):
+        options = {}
+        for stack_options in self.execution_options_stack:
+            options.update(stack_options)
+        return options
+
+    @contextmanager
+    def execution_options(self, **options):
+        """
+        Apply options to the queries executed in the block. Options:
+
+        - prefetch_chunks: The number of chunks that a QuerySet.iterator()
+          fetches ahead of the caller in a background thread.
+        - session_parameters: A dict of session parameters to set (with ALTER
+          SESSION) for the duration of the block.
+        - result_cache: If False, query results aren't read from or added to
+          the 'RESULT_CACHE'.
+        - timeout: The number of seconds after which
+          SnowflakeQuerySet.fetch_async() cancels its query (see
+          statement_timeout()).
+        - warehouse: The name of a warehouse in the 'WAREHOUSES' setting on
+          which to execute queries (see warehouse_options()).
+        """
+        session_parameters = options.get('session_parameters')
+        if session_parameters:
+            self.ensure_connection()
+            self.set_session_parameters(session_parameters)
+        self.execution_options_stack.append(options)
+        try:
+            yield
+        finally:
+            self.execution_options_stack.pop()
+            if session_parameters:
+                # Restore the values of any enclosing blocks or from when the
+                # connection was established.
+                self.set_session_parameters({
+                    name: self.get_stacked_session_parameter(name) for name in session_parameters
+                })
+
+    def get_stacked_session_parameter(self, name):
+        """
+        Return the value of a session parameter set by execution_options() or
+        when connecting, or None if it isn't set.
+        """
+        for options in reversed(self.execution_options_stack):
+            if name in options.get('session_parameters', {}):
+                return options['session_parameters'][name]
+        return self.connection_session_parameters.get(name)
+
+    def set_session_parameters(self, parameters):
+        """
+        Set the given session parameters. A value of None restores the
+        parameter's default.
+        """
+        set_parameters = {name: value for name, value in parameters.items() if value is not None}
+        unset_parameters = [name for name, value in parameters.items() if value is None]
+        with self.connection.cursor() as cursor:
+            if set_parameters:
+                cursor.execute(
+                    'ALTER SESSION SET ' + ' '.join('%s=%%s' % name for name in set_parameters),
+                    list(set_parameters.values()),
+                )
+            if unset_parameters:
+                cursor.execute('ALTER SESSION UNSET ' + ', '.join(unset_parameters))
+
+    def _commit(self):
+        super()._commit()
+        if self.uncommitted_written_tables != set():
+            self.result_cache.invalidate(self.uncommitted_written_tables)
+            self.uncommitted_written_tables = set()
+
+    def _rollback(self):
+        super()._rollback()
+        self.uncommitted_written_tables = set()
 
     def _set_autocommit(self, autocommit):
+        # Skip the query if the session already has this mode (e.g. from
+        # the session parameters when connecting).
+        if self.connection_session_parameters.get('AUTOCOMMIT') == autocommit:
+            return
         with self.wrap_database_errors:
             self.connection.autocommit(autocommit)
+        self.connection_session_parameters['AUTOCOMMIT'] = autocommit
+
+    @async_unsafe
+    def _close(self):
+        pool = self.pool
+        if self.connection is None or pool is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            # Don't reuse a connection that's in a transaction or that may
+            # be broken.
+            discard = self.in_atomic_block or self.errors_occurred
+            if not discard and not self.autocommit:
+                self.connection.rollback()
+            pool.release(self.connection, self.connection_session_parameters, discard)
 
     def is_usable(self):
         try:
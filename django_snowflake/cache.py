@@ -0,0 +1,253 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from django.utils.regex_helper import _lazy_re_compile
+
+from .arrow import pyarrow
+
+# An identifier, possibly qualified. Group 1 is the last part.
+identifier = r'(?:(?:"[^"]+"|\w+)\.)*("[^"]+"|\w+)'
+# Statements whose results may be cached.
+read_re = _lazy_re_compile(r'^\s*(?:SELECT|WITH)\b', re.IGNORECASE)
+# Statements that don't modify any table.
+no_write_re = _lazy_re_compile(
+    r'^\s*(?:SELECT|WITH|SHOW|DESC|DESCRIBE|EXPLAIN|USE|PUT|GET|REMOVE|RM|LIST|LS|BEGIN|COMMIT|ROLLBACK|'
+    r'ALTER\s+(?:SESSION|WAREHOUSE)|CREATE\s+(?:TEMPORARY\s+)?(?:STAGE|FILE\s+FORMAT)|'
+    r'(?:CREATE|DROP)\s+SEQUENCE)\b',
+    re.IGNORECASE,
+)
+read_table_re = _lazy_re_compile(r'\b(?:FROM|JOIN)\s+' + identifier, re.IGNORECASE)
+written_table_re = _lazy_re_compile(
+    r'\b(?:INTO|UPDATE|FROM|TRUNCATE(?:\s+TABLE)?|TABLE(?:\s+IF(?:\s+NOT)?\s+EXISTS)?|'
+    r'(?:MATERIALIZED\s+)?VIEW(?:\s+IF(?:\s+NOT)?\s+EXISTS)?|RENAME\s+TO|SWAP\s+WITH)\s+' + identifier,
+    re.IGNORECASE,
+)
+# Functions whose results change between executions and metadata that
+# changes without DML.
+volatile_re = _lazy_re_compile(
+    r'\b(?:CURRENT_\w+|LOCALTIME\w*|SYSDATE|GETDATE|RANDOM|UUID_STRING|SEQ\d|\w+\.NEXTVAL|'
+    r'INFORMATION_SCHEMA|SYSTEM\$\w+)',
+    re.IGNORECASE,
+)
+
+# {database alias: ResultCache}
+caches = {}
+caches_lock = threading.Lock()
+
+
+def get_cache(alias, options):
+    with caches_lock:
+        if alias not in caches:
+            caches[alias] = ResultCache(**{name.lower(): value for name, value in options.items()})
+        return caches[alias]
+
+
+def normalize_table_name(name):
+    return name if name.startswith('"') else '"%s"' % name.upper()
+
+
+def get_read_tables(sql):
+    """Return the tables read by a query, or None if it isn't cacheable."""
+    if not read_re.search(sql) or volatile_re.search(sql):
+        return None
+    return {normalize_table_name(name) for name in read_table_re.findall(sql)}
+
+
+def get_written_tables(sql):
+    """
+    Return the tables that a statement may modify: an empty set if it
+    doesn't modify any tables or None if they can't be determined.
+    """
+    if no_write_re.search(sql):
+        return set()
+    return {normalize_table_name(name) for name in written_table_re.findall(sql)} or None
+
+
+class CacheEntry:
+    def __init__(self, tables, description, rows, created, expires):
+        self.tables = tables
+        self.description = description
+        self.rows = rows
+        self.created = created
+        self.expires = expires
+
+
+class ResultCache:
+    """
+    A cache of query results with an in-memory LRU tier and an optional
+    disk tier of Arrow IPC files (read with memory mapping) shared by
+    processes that use the same directory.
+
+    - ttl: The number of seconds that an entry is valid.
+    - max_entries: The size of the in-memory tier.
+    - max_rows: Results with more rows aren't cached.
+    - directory: The directory of the disk tier. Requires pyarrow.
+    - disk_ttl: The number of seconds that a disk entry is valid (defaults to
+      ttl).
+
+    Entries are invalidated when a statement executed by this process
+    modifies a table that they read (see CachingCursor). Invalidations are
+    recorded in the disk tier (as the modification time of a file for each
+    table) so that other processes ignore stale files.
+    """
+    def __init__(self, ttl=60, max_entries=1000, max_rows=10000, directory=None, disk_ttl=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self.directory = directory
+        self.disk_ttl = ttl if disk_ttl is None else disk_ttl
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if directory:
+            os.makedirs(os.path.join(directory, 'tables'), exist_ok=True)
+
+    def make_key(self, sql, params, session_parameters, role=None, warehouse=None):
+        """
+        Return the key of a query's results. The role and the warehouse are
+        included since row access policies and secure views may depend on
+        them.
+        """
+        return hashlib.sha256(
+            repr((sql, params, sorted(session_parameters.items()), role, warehouse)).encode()
+        ).hexdigest()
+
+    def get(self, key):
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                if entry.expires > now:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return entry
+                del self.entries[key]
+        entry = self.get_from_disk(key, now)
+        with self.lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.disk_hits += 1
+                self._set(key, entry)
+        return entry
+
+    def set(self, key, tables, description, rows):
+        now = time.time()
+        entry = CacheEntry(tables, description, rows, now, now + self.ttl)
+        with self.lock:
+            self._set(key, entry)
+        self.set_on_disk(key, entry)
+
+    def _set(self, key, entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def invalidate(self, tables=None):
+        """
+        Remove the entries that read any of the given tables, or all entries
+        if tables is None.
+        """
+        with self.lock:
+            if tables is None:
+                self.entries.clear()
+            else:
+                for key, entry in list(self.entries.items()):
+                    if entry.tables & tables:
+                        del self.entries[key]
+        if self.directory:
+            if tables is None:
+                for name in os.listdir(self.directory):
+                    if name.endswith('.arrow'):
+                        self._remove(os.path.join(self.directory, name))
+            else:
+                for table in tables:
+                    path = self._table_path(table)
+                    with open(path, 'a'):
+                        os.utime(path)
+
+    def stats(self):
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+            }
+
+    def _path(self, key):
+        return os.path.join(self.directory, '%s.arrow' % key)
+
+    def _table_path(self, table):
+        return os.path.join(self.directory, 'tables', hashlib.sha256(table.encode()).hexdigest())
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def set_on_disk(self, key, entry):
+        if not self.directory or pyarrow is None:
+            return
+        description = [tuple(column[:7]) for column in entry.description or ()]
+        columns = list(zip(*entry.rows)) if entry.rows else [()] * len(description)
+        try:
+            table = pyarrow.table(
+                [pyarrow.array(column) for column in columns],
+                names=['c%d' % i for i in range(len(columns))],
+            )
+        except (pyarrow.ArrowException, TypeError, ValueError):
+            # The values can't be represented in Arrow.
+            return
+        metadata = {
+            'tables': sorted(entry.tables),
+            'description': description,
+            'created': entry.created,
+        }
+        table = table.replace_schema_metadata({'django_snowflake': json.dumps(metadata, default=str)})
+        # Write to a temporary file so that readers never see a partial file.
+        path = self._path(key)
+        temp_path = '%s.%d.tmp' % (path, os.getpid())
+        try:
+            with pyarrow.OSFile(temp_path, 'wb') as sink:
+                with pyarrow.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            os.replace(temp_path, path)
+        except OSError:
+            self._remove(temp_path)
+
+    def get_from_disk(self, key, now):
+        if not self.directory or pyarrow is None:
+            return None
+        path = self._path(key)
+        try:
+            with pyarrow.memory_map(path) as source:
+                table = pyarrow.ipc.open_file(source).read_all()
+        except (OSError, pyarrow.ArrowException):
+            return None
+        metadata = json.loads(table.schema.metadata[b'django_snowflake'])
+        created = metadata['created']
+        if created + self.disk_ttl <= now:
+            self._remove(path)
+            return None
+        tables = set(metadata['tables'])
+        for table_name in tables:
+            try:
+                if os.path.getmtime(self._table_path(table_name)) >= created:
+                    # The table was modified after the entry was created.
+                    self._remove(path)
+                    return None
+            except OSError:
+                pass
+        rows = list(zip(*(column.to_pylist() for column in table.columns)))
+        description = [tuple(column) for column in metadata['description']]
+        return CacheEntry(tables, description, rows, created, created + self.disk_ttl)
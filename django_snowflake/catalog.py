@@ -0,0 +1,78 @@
+from collections import defaultdict
+
+
+class SchemaCatalog:
+    """
+    A snapshot of the columns and keys of every table in the connection's
+    schema, loaded with a few queries and used by DatabaseIntrospection
+    instead of querying each table. DatabaseSchemaEditor invalidates the
+    tables it alters, which are then introspected individually.
+    """
+    def __init__(self, connection):
+        self.connection = connection
+        # {quoted table name: {kind: rows}} where kind is one of 'columns'
+        # (in the format of DESCRIBE TABLE), 'imported_keys', 'primary_keys',
+        # 'unique_keys' (in the format of SHOW <kind> IN TABLE), and
+        # 'tables' (in the format of SHOW TABLES).
+        self.tables = None
+
+    def load(self, cursor):
+        tables = defaultdict(lambda: defaultdict(list))
+        schema_name = self.connection.ops.quote_name(self.connection.settings_dict['SCHEMA'])
+        # Primary keys are loaded first so that columns can be marked.
+        for kind, table_name_index in (
+            ('imported_keys', 7), ('primary_keys', 3), ('unique_keys', 3), ('tables', 1),
+        ):
+            cursor.execute('SHOW %s IN SCHEMA %s' % (kind.replace('_', ' ').upper(), schema_name))
+            for row in cursor.fetchall():
+                tables['"%s"' % row[table_name_index]][kind].append(row)
+        cursor.execute(
+            "SELECT TABLE_NAME, COLUMN_NAME, DATA_TYPE, CHARACTER_MAXIMUM_LENGTH, "
+            "NUMERIC_PRECISION, NUMERIC_SCALE, DATETIME_PRECISION, IS_NULLABLE, "
+            "COLUMN_DEFAULT, IS_IDENTITY, IDENTITY_START, IDENTITY_INCREMENT, "
+            "COLLATION_NAME, COMMENT "
+            "FROM INFORMATION_SCHEMA.COLUMNS WHERE TABLE_SCHEMA = CURRENT_SCHEMA() "
+            "ORDER BY TABLE_NAME, ORDINAL_POSITION"
+        )
+        for (
+            table_name, name, data_type, max_length, precision, scale, datetime_precision,
+            nullable, default, identity, identity_start, identity_increment, collation, comment,
+        ) in cursor.fetchall():
+            table = tables['"%s"' % table_name]
+            # Convert to the type names shown by DESCRIBE TABLE.
+            if data_type == 'TEXT':
+                data_type = 'VARCHAR(%d)' % max_length
+                if collation:
+                    data_type += " COLLATE '%s'" % collation
+            elif data_type == 'BINARY':
+                data_type = 'BINARY(%d)' % max_length
+            elif data_type == 'NUMBER':
+                data_type = 'NUMBER(%d,%d)' % (precision, scale)
+            elif data_type == 'TIME' or data_type.startswith('TIMESTAMP'):
+                data_type = '%s(%d)' % (data_type, datetime_precision)
+            if identity == 'YES':
+                default = 'IDENTITY START %s INCREMENT %s' % (identity_start, identity_increment)
+            pk = any(row[4] == name for row in table['primary_keys'])
+            unique = any(row[4] == name for row in table['unique_keys'])
+            table['columns'].append((
+                name, data_type, 'COLUMN', 'Y' if nullable == 'YES' else 'N', default,
+                'Y' if pk else 'N', 'Y' if unique else 'N', None, None, comment, None,
+            ))
+        self.tables = tables
+
+    def get_rows(self, cursor, table_name, kind):
+        """
+        Return the rows of the given kind for a table or None if the table
+        isn't in the snapshot.
+        """
+        if self.tables is None:
+            self.load(cursor)
+        table = self.tables.get(self.connection.ops.quote_name(table_name))
+        return None if table is None else table[kind]
+
+    def invalidate(self, table_name):
+        if self.tables is not None:
+            self.tables.pop(self.connection.ops.quote_name(table_name), None)
+
+    def clear(self):
+        self.tables = None
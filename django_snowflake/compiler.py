@@ -0,0 +1,326 @@
+import gzip
+import os
+import tempfile
+from itertools import chain
+
+from django.db.models.sql import compiler
+from django.db.models.sql.constants import GET_ITERATOR_CHUNK_SIZE, MULTI
+
+
+def stage_value(value):
+    """
+    Format a value that's been adapted by DatabaseOperations for a CSV file
+    loaded with DatabaseOperations.stage_file_format. Values are always
+    enclosed in quotes so that an empty string can be distinguished from NULL.
+    """
+    if value is None:
+        return ''
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        value = bytes(value).hex()
+    elif isinstance(value, bool):
+        value = 'TRUE' if value else 'FALSE'
+    return '"%s"' % str(value).replace('"', '""')
+
+
+class SQLCompiler(compiler.SQLCompiler):
+    def compile_converters(self, converters):
+        """
+        Fuse the converters of each column into a function of one argument.
+        Return a list of (position, function) tuples.
+        """
+        connection = self.connection
+        compiled = []
+        for pos, (convs, expression) in converters.items():
+            if len(convs) == 1:
+                def convert(value, converter=convs[0], expression=expression):
+                    return converter(value, expression, connection)
+            else:
+                def convert(value, convs=tuple(convs), expression=expression):
+                    for converter in convs:
+                        value = converter(value, expression, connection)
+                    return value
+            compiled.append((pos, convert))
+        return compiled
+
+    def apply_column_converters(self, results, converters, tuple_expected=False):
+        """
+        Like apply_converters() but convert each chunk of rows a column at a
+        time rather than a value at a time.
+        """
+        for rows in results:
+            if not rows:
+                continue
+            columns = list(zip(*rows))
+            for pos, convert in converters:
+                columns[pos] = map(convert, columns[pos])
+            rows = zip(*columns)
+            yield from (rows if tuple_expected else map(list, rows))
+
+    def execute_sql(self, result_type=MULTI, chunked_fetch=False, chunk_size=GET_ITERATOR_CHUNK_SIZE):
+        # Apply the options of SnowflakeQuerySet.execution_options(). An
+        # aggregation over a subquery has them on the inner query.
+        options = (
+            getattr(self.query, 'snowflake_options', None) or
+            getattr(getattr(self.query, 'inner_query', None), 'snowflake_options', None)
+        )
+        if not options:
+            return super().execute_sql(result_type, chunked_fetch, chunk_size)
+        if 'results' in options and result_type == MULTI:
+            # The rows were fetched by SnowflakeQuerySet.fetch_async(). Set
+            # up the compiler's select as if the query was executed.
+            self.as_sql()
+            rows = options['results']
+            if self.has_extra_select:
+                # Remove the columns added for ordering, as cursor_iter() does.
+                rows = [row[:self.col_count] for row in rows]
+            return iter([rows])
+        with self.connection.execution_options(**options):
+            return super().execute_sql(result_type, chunked_fetch, chunk_size)
+
+    def results_iter(self, results=None, tuple_expected=False, chunked_fetch=False,
+                     chunk_size=GET_ITERATOR_CHUNK_SIZE):
+        if results is None:
+            results = self.execute_sql(MULTI, chunked_fetch=chunked_fetch, chunk_size=chunk_size)
+        fields = [s[0] for s in self.select[0:self.col_count]]
+        converters = self.get_converters(fields)
+        if not converters:
+            return chain.from_iterable(results)
+        return self.apply_column_converters(results, self.compile_converters(converters), tuple_expected)
+
+
+class SQLInsertCompiler(compiler.SQLInsertCompiler, SQLCompiler):
+    def allocate_pks(self):
+        """
+        Assign primary keys to the objects being inserted from the sequence
+        backing the model's AutoField, if any. Return True if keys were
+        assigned.
+        """
+        opts = self.query.get_meta()
+        auto_field = opts.auto_field
+        if (
+            self.connection.pk_allocator is None or self.query.raw or
+            auto_field is None or auto_field in self.query.fields or
+            # Keys of rows that MERGE skips would be wasted.
+            self.query.ignore_conflicts
+        ):
+            return False
+        with self.connection.cursor() as cursor:
+            pks = self.connection.pk_allocator.allocate(
+                cursor, opts.db_table, auto_field.column, len(self.query.objs),
+            )
+        if pks is None:
+            return False
+        for obj, pk in zip(self.query.objs, pks):
+            setattr(obj, auto_field.attname, pk)
+        self.query.fields = [*self.query.fields, auto_field]
+        return True
+
+    def execute_sql(self, returning_fields=None):
+        if self.allocate_pks() and returning_fields:
+            # The INSERT doesn't need to return anything since the primary
+            # keys were assigned beforehand.
+            self.execute_sql()
+            return [
+                tuple(getattr(obj, field.attname) for field in returning_fields)
+                for obj in self.query.objs
+            ]
+        threshold = self.connection.settings_dict.get('BULK_INSERT_STAGE_THRESHOLD')
+        if (
+            threshold and not returning_fields and self.query.fields and
+            len(self.query.objs) >= threshold
+        ):
+            value_rows = self.get_value_rows(self.query.fields)
+            if (
+                # Expressions can't be written to a file.
+                not any(hasattr(value, 'as_sql') for row in value_rows for value in row) and
+                # COPY INTO would load JSON as strings.
+                not any(field.get_internal_type() == 'JSONField' for field in self.query.fields)
+            ):
+                if not self.query.ignore_conflicts or not self.get_conflict_targets(self.query.fields):
+                    self.execute_staged_insert(self.query.fields, value_rows)
+                    return []
+                # Otherwise, the rows are merged with VALUES.
+                if self.connection.ensure_stage_file_format():
+                    self.execute_staged_merge(self.query.fields, value_rows)
+                    return []
+        return super().execute_sql(returning_fields)
+
+    def get_value_rows(self, fields):
+        value_rows = [
+            [self.prepare_value(field, self.pre_save_val(field, obj)) for field in fields]
+            for obj in self.query.objs
+        ]
+        if self.query.ignore_conflicts:
+            value_rows = self.remove_conflicting_rows(fields, value_rows)
+        return value_rows
+
+    def get_conflict_targets(self, fields):
+        """
+        Return lists of the fields whose values identify an existing row that
+        conflicts with a new row: the unique_fields of an upsert, otherwise
+        the primary key and the unique fields and constraints that are
+        inserted. (Snowflake doesn't enforce uniqueness, so MERGE does.)
+        """
+        unique_fields = getattr(self.query, 'unique_fields', None)
+        if unique_fields:
+            # e.g. the primary key of objects without one can't conflict.
+            return [unique_fields] if all(field in fields for field in unique_fields) else []
+        opts = self.query.get_meta()
+        targets = [[field] for field in fields if field.primary_key or field.unique]
+        field_names = [
+            *opts.unique_together,
+            *(constraint.fields for constraint in opts.total_unique_constraints),
+        ]
+        for names in field_names:
+            target = [opts.get_field(name) for name in names]
+            if all(field in fields for field in target):
+                targets.append(target)
+        return targets
+
+    def remove_conflicting_rows(self, fields, value_rows):
+        """
+        Remove the rows that conflict with a previous row of the batch (or for
+        an upsert, with a later row, which would update the same row) since
+        MERGE only compares the new rows with the table's existing rows.
+        """
+        upsert = bool(getattr(self.query, 'update_fields', None))
+        positions = [
+            [fields.index(field) for field in target] for target in self.get_conflict_targets(fields)
+        ]
+        seen = [set() for _ in positions]
+        rows = []
+        for row in (reversed(value_rows) if upsert else value_rows):
+            keys = [tuple(row[i] for i in target) for target in positions]
+            try:
+                if any(None not in key and key in seen_keys for key, seen_keys in zip(keys, seen)):
+                    continue
+                for key, seen_keys in zip(keys, seen):
+                    seen_keys.add(key)
+            except TypeError:
+                # An unhashable value, e.g. an expression.
+                pass
+            rows.append(row)
+        return rows[::-1] if upsert else rows
+
+    def merge_sql(self, fields, source):
+        """
+        Return a MERGE statement that inserts the rows of `source` (a
+        subquery or table with a column for each field) that don't conflict
+        with existing rows or, for an upsert, updates the existing rows.
+        """
+        qn = self.connection.ops.quote_name
+        table = qn(self.query.get_meta().db_table)
+        alias = qn(self.connection.ops.merge_source_alias)
+        conditions = [
+            '(%s)' % ' AND '.join(
+                '%s.%s = %s.%s' % (table, qn(field.column), alias, qn(field.column)) for field in target
+            )
+            for target in self.get_conflict_targets(fields)
+        ]
+        sql = 'MERGE INTO %s USING %s AS %s ON %s' % (table, source, alias, ' OR '.join(conditions))
+        update_fields = getattr(self.query, 'update_fields', None)
+        if update_fields:
+            sql += ' WHEN MATCHED THEN UPDATE SET %s' % ', '.join(
+                '%s = %s.%s' % (qn(field.column), alias, qn(field.column)) for field in update_fields
+            )
+        return sql + ' WHEN NOT MATCHED THEN INSERT (%s) VALUES (%s)' % (
+            ', '.join(qn(field.column) for field in fields),
+            ', '.join('%s.%s' % (alias, qn(field.column)) for field in fields),
+        )
+
+    def as_sql(self):
+        fields = self.query.fields
+        merge = self.query.ignore_conflicts and fields and self.get_conflict_targets(fields)
+        # PARSE_JSON() isn't allowed in VALUES, so rows with JSON are inserted
+        # with INSERT ... SELECT ... FROM VALUES.
+        if not merge and not any(field.get_internal_type() == 'JSONField' for field in fields):
+            return super().as_sql()
+        value_rows = self.get_value_rows(fields)
+        placeholder_rows, param_rows = self.assemble_as_sql(fields, value_rows)
+        params = tuple(chain.from_iterable(param_rows))
+        if merge:
+            source = '(%s)' % self.connection.ops.values_select_sql(fields, placeholder_rows, aliases=True)
+            return [(self.merge_sql(fields, source), params)]
+        qn = self.connection.ops.quote_name
+        return [('%s %s (%s) %s' % (
+            self.connection.ops.insert_statement(ignore_conflicts=self.query.ignore_conflicts),
+            qn(self.query.get_meta().db_table),
+            ', '.join(qn(field.column) for field in fields),
+            self.connection.ops.values_select_sql(fields, placeholder_rows),
+        ), params)]
+
+    def execute_staged_merge(self, fields, value_rows):
+        """
+        Upload the rows to the table's stage (see put_rows()) and merge them
+        into the table by querying the staged file with the file format of
+        DatabaseWrapper.ensure_stage_file_format().
+        """
+        qn = self.connection.ops.quote_name
+        columns = []
+        for position, field in enumerate(fields, 1):
+            if field.get_internal_type() == 'BinaryField':
+                value = "TO_BINARY($%d, 'HEX')" % position
+            else:
+                value = 'CAST($%d AS %s)' % (position, field.cast_db_type(self.connection))
+            columns.append('%s AS %s' % (value, qn(field.column)))
+        with self.connection.cursor() as cursor:
+            staged_file = self.put_rows(cursor, value_rows)
+            try:
+                source = "(SELECT %s FROM %s (FILE_FORMAT => '%s'))" % (
+                    ', '.join(columns), staged_file, self.connection.ops.stage_file_format_name,
+                )
+                cursor.execute(self.merge_sql(fields, source))
+            finally:
+                cursor.execute('REMOVE %s' % staged_file)
+
+    def put_rows(self, cursor, value_rows):
+        """
+        Write the rows to a compressed CSV file and upload it to the table's
+        stage. Return the path of the staged file. Unlike a named stage, a
+        table stage doesn't have to be created, so no DDL commits the
+        transaction of bulk_create() (and any outer atomic block).
+        """
+        stage = '@%' + self.connection.ops.quote_name(self.query.get_meta().db_table)
+        fd, path = tempfile.mkstemp(prefix='bulk_insert_', suffix='.csv.gz')
+        try:
+            with os.fdopen(fd, 'wb') as raw, gzip.open(raw, 'wt', encoding='utf-8', newline='') as f:
+                for row in value_rows:
+                    f.write(','.join(map(stage_value, row)) + '\n')
+            cursor.execute(
+                "PUT 'file://%s' %s AUTO_COMPRESS=FALSE SOURCE_COMPRESSION=GZIP" % (
+                    path.replace('\\', '/'), stage,
+                )
+            )
+        finally:
+            os.remove(path)
+        return '%s/%s' % (stage, os.path.basename(path))
+
+    def execute_staged_insert(self, fields, value_rows):
+        """
+        Upload the rows to the table's stage and load them with COPY INTO.
+        This is much faster than compiling a large INSERT statement.
+        """
+        qn = self.connection.ops.quote_name
+        with self.connection.cursor() as cursor:
+            staged_file = self.put_rows(cursor, value_rows)
+            cursor.execute(
+                'COPY INTO %(table)s (%(columns)s) FROM %(file)s '
+                'FILE_FORMAT=(%(file_format)s) PURGE=TRUE' % {
+                    'table': qn(self.query.get_meta().db_table),
+                    'columns': ', '.join(qn(field.column) for field in fields),
+                    'file': staged_file,
+                    'file_format': self.connection.ops.stage_file_format,
+                }
+            )
+
+
+class SQLDeleteCompiler(compiler.SQLDeleteCompiler, SQLCompiler):
+    pass
+
+
+class SQLUpdateCompiler(compiler.SQLUpdateCompiler, SQLCompiler):
+    pass
+
+
+class SQLAggregateCompiler(compiler.SQLAggregateCompiler, SQLCompiler):
+    pass
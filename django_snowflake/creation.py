@@ -2,8 +2,16 @@ import sys
 
 from django.db.backends.base.creation import BaseDatabaseCreation
 
+from .utils import wait_for_queries
+
+# {clone suffix: ID of the asynchronous query creating the clone}
+pending_clones = {}
+
 
 class DatabaseCreation(BaseDatabaseCreation):
+    # The tables in the snapshot of the test schema, if any.
+    snapshot_tables = None
+
     def _quote_name(self, name):
         return self.connection.ops.quote_name(name)
 
@@ -24,6 +32,64 @@ class DatabaseCreation(BaseDatabaseCreation):
         schema_name = self._quote_name(self.connection.settings_dict['SCHEMA'])
         cursor.execute(f'CREATE SCHEMA IF NOT EXISTS {schema_name}')
 
+    def create_test_db(self, *args, **kwargs):
+        test_database_name = super().create_test_db(*args, **kwargs)
+        if self.connection.settings_dict['TEST'].get('SNAPSHOT'):
+            self.create_snapshot()
+        return test_database_name
+
+    @property
+    def snapshot_schema(self):
+        return self._quote_name(self.connection.settings_dict['SCHEMA'] + '_SNAPSHOT')
+
+    def create_snapshot(self):
+        """
+        Clone the test schema so that DatabaseOperations.execute_sql_flush()
+        can restore it rather than emptying each table.
+        """
+        schema = self._quote_name(self.connection.settings_dict['SCHEMA'])
+        tables = {
+            self._quote_name(table_name)
+            for table_name in self.connection.introspection.django_table_names(
+                only_existing=True, include_views=False,
+            )
+        }
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'CREATE OR REPLACE SCHEMA {self.snapshot_schema} CLONE {schema}')
+            # Empty the snapshot's tables so that restoring it is equivalent
+            # to a flush: rows created by data migrations and post_migrate
+            # handlers (e.g. content types and permissions) aren't restored,
+            # and post_migrate recreates them as it does after a flush.
+            for table in sorted(tables):
+                cursor.execute(f'TRUNCATE TABLE {self.snapshot_schema}.{table}')
+            # Cloning a schema changes the session's current schema.
+            cursor.execute(f'USE SCHEMA {schema}')
+        self.snapshot_tables = tables
+
+    def restore_snapshot(self):
+        """Replace the test schema with a clone of its snapshot."""
+        schema = self._quote_name(self.connection.settings_dict['SCHEMA'])
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'CREATE OR REPLACE SCHEMA {schema} CLONE {self.snapshot_schema}')
+            cursor.execute(f'USE SCHEMA {schema}')
+        # The tables and sequences are replaced.
+        if self.connection.introspection.catalog is not None:
+            self.connection.introspection.catalog.clear()
+        if self.connection.result_cache is not None:
+            self.connection.result_cache.invalidate()
+        if self.connection.pk_allocator is not None:
+            self.connection.pk_allocator.reset()
+        # Temporary objects in the schema are dropped too.
+        self.connection.has_stage_file_format = False
+
+    def get_test_db_clone_settings(self, suffix):
+        # Wait for the clone if it's being created (e.g. when a --parallel
+        # worker starts).
+        if suffix in pending_clones:
+            with self._nodb_cursor() as cursor:
+                wait_for_queries(cursor.db.connection, [pending_clones.pop(suffix)])
+        return super().get_test_db_clone_settings(suffix)
+
     def _clone_test_db(self, suffix, verbosity, keepdb=False):
         source_database_name = self.connection.settings_dict['NAME']
         target_database_name = self.get_test_db_clone_settings(suffix)['NAME']
@@ -31,6 +97,13 @@ class DatabaseCreation(BaseDatabaseCreation):
             'dbname': self._quote_name(target_database_name),
             'suffix': 'CLONE ' + self._quote_name(source_database_name),
         }
+        if not keepdb:
+            # Create the clones of --parallel workers concurrently. Each
+            # worker waits for its clone in get_test_db_clone_settings().
+            with self._nodb_cursor() as cursor, cursor.db.wrap_database_errors:
+                cursor.cursor.execute_async('CREATE OR REPLACE DATABASE %(dbname)s %(suffix)s' % test_db_params)
+                pending_clones[suffix] = cursor.cursor.sfqid
+            return
         with self._nodb_cursor() as cursor:
             try:
                 self._execute_create_test_db(cursor, test_db_params, keepdb)
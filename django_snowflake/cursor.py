@@ -0,0 +1,371 @@
+import queue
+import threading
+import time
+from collections import deque
+from itertools import chain, islice
+
+from snowflake.connector.errors import DatabaseError, NotSupportedError
+
+from .arrow import table_to_rows
+from .cache import get_read_tables, get_written_tables
+from .signals import query_executed
+from .telemetry import get_origin, get_query_tag
+from .warehouses import is_queued_timeout
+
+
+class CursorProxy:
+    """
+    Wrap a snowflake.connector cursor, delegating anything that isn't
+    overridden.
+    """
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def __getattr__(self, attr):
+        return getattr(self.cursor, attr)
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def execute(self, *args, **kwargs):
+        self.cursor.execute(*args, **kwargs)
+        # Like the connector's cursor, return the cursor to allow chaining.
+        return self
+
+
+class ArrowCursor(CursorProxy):
+    """
+    Fetch results with fetch_arrow_batches() and convert each batch a column
+    at a time rather than building each row in the connector. Results that
+    aren't in Arrow format (e.g. from SHOW commands) are fetched normally.
+    """
+    # An iterator of rows, False if the result isn't in Arrow format, or None
+    # if it hasn't been determined yet.
+    rows = None
+
+    def execute(self, *args, **kwargs):
+        self.rows = None
+        return super().execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        self.rows = None
+        self.cursor.executemany(*args, **kwargs)
+        return self
+
+    def _get_rows(self):
+        if self.rows is None:
+            try:
+                batches = self.cursor.fetch_arrow_batches()
+            except NotSupportedError:
+                self.rows = False
+            else:
+                # Convert one batch at a time as rows are consumed.
+                self.rows = chain.from_iterable(map(table_to_rows, batches))
+        return self.rows
+
+    def fetchone(self):
+        rows = self._get_rows()
+        if rows is False:
+            return self.cursor.fetchone()
+        return next(rows, None)
+
+    def fetchmany(self, size=None):
+        rows = self._get_rows()
+        if rows is False:
+            return self.cursor.fetchmany(size)
+        return list(islice(rows, size or self.cursor.arraysize))
+
+    def fetchall(self):
+        rows = self._get_rows()
+        if rows is False:
+            return self.cursor.fetchall()
+        return list(rows)
+
+
+class TelemetryCursor(CursorProxy):
+    """
+    Record the query ID of each statement on the DatabaseWrapper, send the
+    query_executed signal if it has receivers, and set the QUERY_TAG of the
+    current request if 'REQUEST_QUERY_TAG' is enabled.
+    """
+    def __init__(self, cursor, wrapper):
+        super().__init__(cursor)
+        self.wrapper = wrapper
+
+    def execute(self, sql, params=None, *args, **kwargs):
+        return self._execute(self.cursor.execute, sql, params, False, *args, **kwargs)
+
+    def executemany(self, sql, param_list, *args, **kwargs):
+        return self._execute(self.cursor.executemany, sql, param_list, True, *args, **kwargs)
+
+    def set_query_tag(self):
+        # Don't override a QUERY_TAG set with execution_options().
+        if 'QUERY_TAG' in self.wrapper.current_execution_options.get('session_parameters', {}):
+            return
+        session_parameters = self.wrapper.connection_session_parameters
+        query_tag = get_query_tag()
+        if query_tag is None:
+            # Restore the connection's QUERY_TAG after a request.
+            query_tag = self.wrapper.settings_query_tag
+        if session_parameters.get('QUERY_TAG') != query_tag:
+            if query_tag is None:
+                self.cursor.execute('ALTER SESSION UNSET QUERY_TAG')
+            else:
+                self.cursor.execute('ALTER SESSION SET QUERY_TAG=%s', [query_tag])
+            session_parameters['QUERY_TAG'] = query_tag
+
+    def _execute(self, method, sql, params, many, *args, **kwargs):
+        if self.wrapper.settings_dict.get('REQUEST_QUERY_TAG'):
+            self.set_query_tag()
+        if not query_executed.has_listeners():
+            method(sql, params, *args, **kwargs)
+            self.wrapper.last_query_id = self.cursor.sfqid
+            return self
+        exception = None
+        start = time.monotonic()
+        try:
+            method(sql, params, *args, **kwargs)
+        except Exception as exc:
+            exception = exc
+            raise
+        finally:
+            duration = time.monotonic() - start
+            query_id = self.wrapper.last_query_id = self.cursor.sfqid
+            query_executed.send(
+                sender=self.wrapper.__class__, connection=self.wrapper, sql=sql,
+                params=params, many=many, query_id=query_id, duration=duration,
+                rowcount=self.cursor.rowcount, origin=get_origin(), exception=exception,
+            )
+        return self
+
+
+class WarehouseCursor(CursorProxy):
+    """
+    Switch the session to the warehouse selected by execution_options()
+    before each statement, and retry statements that are canceled after being
+    queued on a warehouse with a fallback on the fallback warehouse.
+    """
+    def __init__(self, cursor, wrapper):
+        super().__init__(cursor)
+        self.wrapper = wrapper
+
+    def execute(self, *args, **kwargs):
+        return self._execute(self.cursor.execute, *args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        return self._execute(self.cursor.executemany, *args, **kwargs)
+
+    def _execute(self, method, *args, **kwargs):
+        wrapper = self.wrapper
+        warehouse = wrapper.selected_warehouse
+        if wrapper.current_warehouse != warehouse.name:
+            wrapper.use_warehouse(warehouse)
+        try:
+            method(*args, **kwargs)
+        except DatabaseError as exc:
+            if warehouse.fallback is None or not is_queued_timeout(exc):
+                raise
+            # The next statement switches back to the selected warehouse.
+            wrapper.use_warehouse(wrapper.warehouses[warehouse.fallback])
+            method(*args, **kwargs)
+        return self
+
+
+class CachingCursor(CursorProxy):
+    """
+    Serve the results of SELECT queries from a ResultCache and invalidate the
+    cache's entries for the tables modified by other statements.
+    """
+    # An iterator of the rows of a cached result, or None.
+    rows = None
+
+    def __init__(self, cursor, cache, wrapper):
+        super().__init__(cursor)
+        self.cache = cache
+        self.wrapper = wrapper
+
+    @property
+    def description(self):
+        return self.cached_description if self.rows is not None else self.cursor.description
+
+    @property
+    def rowcount(self):
+        return self.cached_rowcount if self.rows is not None else self.cursor.rowcount
+
+    def execute(self, sql, params=None, *args, **kwargs):
+        self.rows = None
+        tables = self.get_cacheable_tables(sql)
+        if tables is None:
+            self.invalidate(sql)
+            return super().execute(sql, params, *args, **kwargs)
+        session_parameters = {
+            **self.wrapper.connection_session_parameters,
+            **self.wrapper.current_execution_options.get('session_parameters', {}),
+        }
+        # The QUERY_TAG (e.g. set for each request) doesn't affect results.
+        session_parameters.pop('QUERY_TAG', None)
+        key = self.cache.make_key(
+            sql, params, session_parameters,
+            role=self.wrapper.settings_dict['OPTIONS'].get('role'),
+            warehouse=self.wrapper.selected_warehouse.name,
+        )
+        entry = self.cache.get(key)
+        if entry is None:
+            super().execute(sql, params, *args, **kwargs)
+            rows = self.cursor.fetchmany(self.cache.max_rows + 1)
+            if len(rows) <= self.cache.max_rows:
+                self.cache.set(key, tables, self.cursor.description, rows)
+                self.set_rows(rows, self.cursor.description)
+            else:
+                # Too many rows to cache. Return these followed by the rest.
+                self.set_rows(chain(rows, iter(self.cursor.fetchone, None)), self.cursor.description)
+        else:
+            self.set_rows(entry.rows, entry.description)
+        return self
+
+    def executemany(self, sql, *args, **kwargs):
+        self.rows = None
+        self.invalidate(sql)
+        return self.cursor.executemany(sql, *args, **kwargs)
+
+    def invalidate(self, sql):
+        """Invalidate the entries of the tables that a statement may modify."""
+        written_tables = get_written_tables(sql)
+        if written_tables == set():
+            return
+        self.cache.invalidate(written_tables)
+        if self.wrapper.in_atomic_block or not self.wrapper.autocommit:
+            # Until the transaction commits, queries in other sessions read
+            # (and this process may cache) the old rows, so the entries are
+            # invalidated again when it commits.
+            uncommitted = self.wrapper.uncommitted_written_tables
+            self.wrapper.uncommitted_written_tables = (
+                None if uncommitted is None or written_tables is None else uncommitted | written_tables
+            )
+
+    def get_cacheable_tables(self, sql):
+        """
+        Return the tables read by the query if its results may be cached,
+        otherwise None.
+        """
+        if (
+            self.wrapper.in_atomic_block or not self.wrapper.autocommit or
+            not self.wrapper.current_execution_options.get('result_cache', True)
+        ):
+            return None
+        return get_read_tables(sql)
+
+    def set_rows(self, rows, description):
+        if isinstance(rows, list):
+            self.cached_rowcount = len(rows)
+        else:
+            self.cached_rowcount = -1
+        self.cached_description = description
+        self.rows = iter(rows)
+
+    def fetchone(self):
+        if self.rows is None:
+            return self.cursor.fetchone()
+        return next(self.rows, None)
+
+    def fetchmany(self, size=None):
+        if self.rows is None:
+            return self.cursor.fetchmany(size)
+        return list(islice(self.rows, size or self.cursor.arraysize))
+
+    def fetchall(self):
+        if self.rows is None:
+            return self.cursor.fetchall()
+        return list(self.rows)
+
+
+class PrefetchingCursor(CursorProxy):
+    """
+    Fetch the next chunk of rows in a background thread while the caller
+    processes the current one. At most `prefetch_chunks` chunks are held
+    ahead of the caller.
+    """
+    thread = None
+
+    def __init__(self, cursor, prefetch_chunks):
+        super().__init__(cursor)
+        self.prefetch_chunks = prefetch_chunks
+
+    def execute(self, *args, **kwargs):
+        self.stop()
+        return super().execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        self.stop()
+        self.cursor.executemany(*args, **kwargs)
+        return self
+
+    def _prefetch(self, size):
+        try:
+            while not self.stopped.is_set():
+                rows = self.cursor.fetchmany(size)
+                self._put(rows)
+                if not rows:
+                    break
+        except Exception as exc:
+            self._put(exc)
+
+    def _put(self, item):
+        # Give up if the caller stops reading (e.g. closes the cursor).
+        while not self.stopped.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+            except queue.Full:
+                continue
+            return
+
+    def fetchmany(self, size=None):
+        if self.thread is None:
+            # Rows of the current chunk that fetchone() hasn't returned.
+            self.buffer = deque()
+            self.exhausted = False
+            self.queue = queue.Queue(self.prefetch_chunks)
+            self.stopped = threading.Event()
+            self.thread = threading.Thread(
+                target=self._prefetch, args=(size or self.cursor.arraysize,), daemon=True,
+            )
+            self.thread.start()
+        if self.buffer:
+            rows, self.buffer = list(self.buffer), deque()
+            return rows
+        if self.exhausted:
+            return []
+        rows = self.queue.get()
+        if isinstance(rows, Exception):
+            self.exhausted = True
+            raise rows
+        if not rows:
+            self.exhausted = True
+        return rows
+
+    def fetchone(self):
+        if not self.thread or not self.buffer:
+            self.buffer = deque(self.fetchmany())
+        return self.buffer.popleft() if self.buffer else None
+
+    def fetchall(self):
+        rows = []
+        for chunk in iter(self.fetchmany, []):
+            rows.extend(chunk)
+        return rows
+
+    def stop(self):
+        if self.thread is not None:
+            self.stopped.set()
+            self.thread.join()
+            self.thread = None
+
+    def close(self):
+        self.stop()
+        self.cursor.close()
@@ -0,0 +1,83 @@
+import json
+
+
+class PlanOperator:
+    """An operator of a query plan from EXPLAIN USING JSON."""
+    def __init__(self, data):
+        self.id = data.get('id')
+        self.operation = data.get('operation')
+        self.parent_ids = data.get('parentOperators', [])
+        # Fully qualified names of the tables (or other objects) it reads.
+        self.objects = data.get('objects', [])
+        self.expressions = data.get('expressions', [])
+        self.partitions_total = data.get('partitionsTotal')
+        self.partitions_assigned = data.get('partitionsAssigned')
+        self.bytes_assigned = data.get('bytesAssigned')
+        self.data = data
+
+    def __repr__(self):
+        return '<%s %s: %s>' % (self.__class__.__name__, self.id, self.operation)
+
+    @property
+    def is_table_scan(self):
+        return self.operation == 'TableScan'
+
+    @property
+    def partition_ratio(self):
+        """The fraction of the partitions that are scanned, or None."""
+        if not self.partitions_total:
+            return None
+        return self.partitions_assigned / self.partitions_total
+
+    def reads(self, table_name):
+        """
+        Return True if the operator reads the given table (an unqualified
+        name matches any schema).
+        """
+        table_name = table_name.strip('"').upper()
+        return any(
+            name.upper() == table_name or name.upper().endswith('.' + table_name)
+            for name in self.objects
+        )
+
+
+class ExplainPlan:
+    """A query plan from EXPLAIN USING JSON."""
+    def __init__(self, data):
+        stats = data.get('GlobalStats', {})
+        self.partitions_total = stats.get('partitionsTotal')
+        self.partitions_assigned = stats.get('partitionsAssigned')
+        self.bytes_assigned = stats.get('bytesAssigned')
+        # Operations is a list of plans, one for each step of the query.
+        self.operators = [
+            PlanOperator(operator) for step in data.get('Operations', []) for operator in step
+        ]
+        self.data = data
+
+    @property
+    def partition_ratio(self):
+        """The fraction of the partitions that are scanned, or None."""
+        if not self.partitions_total:
+            return None
+        return self.partitions_assigned / self.partitions_total
+
+    @property
+    def table_scans(self):
+        return [operator for operator in self.operators if operator.is_table_scan]
+
+    def scans_of(self, table_name):
+        return [operator for operator in self.table_scans if operator.reads(table_name)]
+
+    @property
+    def full_table_scans(self):
+        """Table scans of more than one partition that aren't pruned."""
+        return [
+            operator for operator in self.table_scans
+            if operator.partitions_total and operator.partitions_total > 1 and
+            operator.partitions_assigned == operator.partitions_total
+        ]
+
+
+def parse_plan(plan):
+    """Parse the output of QuerySet.explain(format='JSON')."""
+    return ExplainPlan(json.loads(plan))
@@ -5,7 +5,7 @@ from django.utils.functional import cached_property
 
 class DatabaseFeatures(BaseDatabaseFeatures):
     can_clone_databases = True
-    can_introspect_json_field = False
+    can_introspect_json_field = True
     closed_cursor_error_class = InterfaceError
     # This feature is specific to the Django fork used for testing.
     enforces_foreign_key_constraints = False
@@ -19,12 +19,15 @@ class DatabaseFeatures(BaseDatabaseFeatures):
     supports_column_check_constraints = False
     supports_table_check_constraints = False
     supports_expression_indexes = False
-    supports_ignore_conflicts = False
+    # Implemented with MERGE.
+    supports_ignore_conflicts = True
     # This feature is specific to the Django fork used for testing.
     supports_indexes = False
     supports_index_column_ordering = False
-    # Not yet implemented in this backend.
-    supports_json_field = False
+    # JSONField is stored as VARIANT (see lookups.py).
+    supports_json_field = True
+    # Except for contained_by.
+    supports_json_field_contains = True
     supports_over_clause = True
     supports_partial_indexes = False
     # https://docs.snowflake.com/en/sql-reference/functions-regexp.html#backreferences
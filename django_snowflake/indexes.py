@@ -0,0 +1,76 @@
+from django.db.models import Index
+
+
+class SnowflakeIndex(Index):
+    """
+    Base class for Snowflake features that are declared in Meta.indexes.
+    Unlike Django's Index (which Snowflake doesn't support and which is
+    ignored), these are created and removed by migrations.
+    """
+    def __init__(self, *, fields=(), name=None):
+        if not fields:
+            raise ValueError('%s requires at least one field.' % self.__class__.__name__)
+        super().__init__(fields=fields, name=name)
+
+    def get_columns(self, model, schema_editor):
+        return [
+            schema_editor.quote_name(model._meta.get_field(field_name).column)
+            for field_name, _ in self.fields_orders
+        ]
+
+
+class ClusterBy(SnowflakeIndex):
+    """
+    A table's clustering key: ALTER TABLE ... CLUSTER BY (fields). A table
+    may only have one.
+    """
+    suffix = 'cluster'
+
+    def create_sql(self, model, schema_editor, using='', **kwargs):
+        return schema_editor.sql_cluster_by % {
+            'table': schema_editor.quote_name(model._meta.db_table),
+            'columns': ', '.join(self.get_columns(model, schema_editor)),
+        }
+
+    def remove_sql(self, model, schema_editor, **kwargs):
+        return schema_editor.sql_drop_clustering_key % {
+            'table': schema_editor.quote_name(model._meta.db_table),
+        }
+
+
+class SearchOptimization(SnowflakeIndex):
+    """
+    Search optimization of a table's columns for equality (the default) or
+    substring lookups: ALTER TABLE ... ADD SEARCH OPTIMIZATION ON
+    method(fields).
+    """
+    suffix = 'search'
+    methods = ('EQUALITY', 'SUBSTRING')
+
+    def __init__(self, *, fields=(), name=None, method='EQUALITY'):
+        if method.upper() not in self.methods:
+            raise ValueError(
+                'SearchOptimization.method must be one of: %s.' % ', '.join(self.methods)
+            )
+        self.method = method.upper()
+        super().__init__(fields=fields, name=name)
+
+    def deconstruct(self):
+        path, args, kwargs = super().deconstruct()
+        if self.method != 'EQUALITY':
+            kwargs['method'] = self.method
+        return path, args, kwargs
+
+    def create_sql(self, model, schema_editor, using='', **kwargs):
+        return schema_editor.sql_add_search_optimization % {
+            'table': schema_editor.quote_name(model._meta.db_table),
+            'method': self.method,
+            'columns': ', '.join(self.get_columns(model, schema_editor)),
+        }
+
+    def remove_sql(self, model, schema_editor, **kwargs):
+        return schema_editor.sql_drop_search_optimization % {
+            'table': schema_editor.quote_name(model._meta.db_table),
+            'method': self.method,
+            'columns': ', '.join(self.get_columns(model, schema_editor)),
+        }
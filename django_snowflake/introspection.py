@@ -3,14 +3,40 @@ from collections import namedtuple
 from django.db.backends.base.introspection import (
     BaseDatabaseIntrospection, FieldInfo as BaseFieldInfo, TableInfo,
 )
+from django.utils.functional import cached_property
 from django.utils.regex_helper import _lazy_re_compile
 
+from .catalog import SchemaCatalog
+from .indexes import ClusterBy, SearchOptimization
+
 FieldInfo = namedtuple('FieldInfo', BaseFieldInfo._fields + ('pk',))
+cluster_by_re = _lazy_re_compile(r'^LINEAR\((.*)\)$')
 collation_re = _lazy_re_compile(r"^VARCHAR\(\d+\) COLLATE '([\w+\-]+)'$")
 field_size_re = _lazy_re_compile(r'^[A-Z]+\((\d+)\)')
 precision_and_scale_re = _lazy_re_compile(r'^NUMBER\((\d+),(\d+)\)$')
 
 
+def get_cluster_by_columns(cluster_by):
+    """
+    Return the columns (or expressions) of a clustering key from a
+    "LINEAR(A, B)" value of SHOW TABLES' cluster_by column.
+    """
+    m = cluster_by_re.search(cluster_by or '')
+    if not m:
+        return []
+    columns, depth, start = [], 0, 0
+    for i, char in enumerate(m[1]):
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            columns.append(m[1][start:i].strip())
+            start = i + 1
+    columns.append(m[1][start:].strip())
+    return columns
+
+
 def get_collation(name):
     """
     Return the collation from a "VARCHAR(11) COLLATE 'collation'" type name.
@@ -50,14 +76,37 @@ class DatabaseIntrospection(BaseDatabaseIntrospection):
         'TIME': 'TimeField',
         'TIMESTAMP_LTZ': 'DateTimeField',
         'VARCHAR': 'CharField',
+        'VARIANT': 'JSONField',
     }
 
+    # Whether get_constraints() includes the clustering key and search
+    # optimization, which each add a query (without the catalog). See
+    # DatabaseSchemaEditor._constraint_names().
+    include_table_options = True
+
+    @cached_property
+    def catalog(self):
+        if self.connection.settings_dict.get('INTROSPECTION_CACHE'):
+            return SchemaCatalog(self.connection)
+        return None
+
+    def _get_rows(self, cursor, table_name, kind, sql):
+        """
+        Return the rows of the given kind (see SchemaCatalog) from the catalog,
+        if enabled, otherwise by executing sql (formatted with the quoted
+        table name).
+        """
+        if self.catalog is not None:
+            rows = self.catalog.get_rows(cursor, table_name, kind)
+            if rows is not None:
+                return rows
+        cursor.execute(sql % self.connection.ops.quote_name(table_name))
+        return cursor.fetchall()
+
     def get_constraints(self, cursor, table_name):
-        table_name = self.connection.ops.quote_name(table_name)
         constraints = {}
         # Foreign keys
-        cursor.execute(f'SHOW IMPORTED KEYS IN TABLE {table_name}')
-        for row in cursor.fetchall():
+        for row in self._get_rows(cursor, table_name, 'imported_keys', 'SHOW IMPORTED KEYS IN TABLE %s'):
             constraints[self.identifier_converter(row[12])] = {
                 'columns': [self.identifier_converter(row[8])],
                 'primary_key': False,
@@ -67,8 +116,7 @@ class DatabaseIntrospection(BaseDatabaseIntrospection):
                 'index': False,
             }
         # Primary keys
-        cursor.execute(f'SHOW PRIMARY KEYS IN TABLE {table_name}')
-        for row in cursor.fetchall():
+        for row in self._get_rows(cursor, table_name, 'primary_keys', 'SHOW PRIMARY KEYS IN TABLE %s'):
             constraints[self.identifier_converter(row[6])] = {
                 'columns': [self.identifier_converter(row[4])],
                 'primary_key': True,
@@ -78,12 +126,11 @@ class DatabaseIntrospection(BaseDatabaseIntrospection):
                 'index': False,
             }
         # Unique constraints
-        cursor.execute(f'SHOW UNIQUE KEYS IN TABLE {table_name}')
         # The columns of multi-column unique indexes are ordered by row[5].
         # Map {constraint_name: [(row[5], column_name), ...] so the columns can
         # be sorted for each constraint.
         unique_column_orders = {}
-        for row in cursor.fetchall():
+        for row in self._get_rows(cursor, table_name, 'unique_keys', 'SHOW UNIQUE KEYS IN TABLE %s'):
             column_name = self.identifier_converter(row[4])
             constraint_name = self.identifier_converter(row[6])
             if constraint_name in constraints:
@@ -104,8 +151,71 @@ class DatabaseIntrospection(BaseDatabaseIntrospection):
         # Order the columns of multi-column unique indexes.
         for constraint_name, orders in unique_column_orders.items():
             constraints[constraint_name]['columns'] = [col for _, col in sorted(orders)]
+        if not self.include_table_options:
+            return constraints
+        table_row = self._get_table_row(cursor, table_name)
+        # Clustering key
+        cluster_by_columns = self.get_cluster_by_columns(cursor, table_name, table_row)
+        if cluster_by_columns:
+            constraints['cluster_by'] = {
+                'columns': cluster_by_columns,
+                'primary_key': False,
+                'unique': False,
+                'foreign_key': None,
+                'check': False,
+                'index': True,
+                'type': ClusterBy.suffix,
+                'orders': [],
+            }
+        # Search optimization (each expression of each method)
+        if table_row is not None and len(table_row) > 13 and table_row[13] == 'ON':
+            cursor.execute(
+                'DESCRIBE SEARCH OPTIMIZATION ON %s' % self.connection.ops.quote_name(table_name)
+            )
+            for expression_id, method, target, *_ in cursor.fetchall():
+                constraints['search_optimization_%s' % expression_id] = {
+                    'columns': [self._column_name(target)],
+                    'primary_key': False,
+                    'unique': False,
+                    'foreign_key': None,
+                    'check': False,
+                    'index': True,
+                    'type': SearchOptimization.suffix,
+                    'orders': [],
+                    'method': method,
+                }
         return constraints
 
+    def _get_table_row(self, cursor, table_name):
+        """Return the table's row from SHOW TABLES, or None for views."""
+        name = self.connection.ops.quote_name(table_name)[1:-1]
+        rows = self.catalog.get_rows(cursor, table_name, 'tables') if self.catalog is not None else None
+        if rows is None:
+            # SHOW TABLES takes a pattern rather than an identifier.
+            cursor.execute("SHOW TABLES LIKE '%s'" % name.replace("'", "\\'"))
+            rows = cursor.fetchall()
+        for row in rows:
+            if row[1] == name:
+                return row
+        return None
+
+    def _column_name(self, column):
+        if column.startswith('"') and column.endswith('"'):
+            return column[1:-1]
+        # Expressions are returned as is.
+        return self.identifier_converter(column) if column.isidentifier() else column
+
+    def get_cluster_by_columns(self, cursor, table_name, table_row=None):
+        """
+        Return the columns of the table's clustering key (expressions are
+        returned as is), if any.
+        """
+        if table_row is None:
+            table_row = self._get_table_row(cursor, table_name)
+        if table_row is None:
+            return []
+        return [self._column_name(column) for column in get_cluster_by_columns(table_row[6])]
+
     def get_primary_key_column(self, cursor, table_name):
         pks = [field.name for field in self.get_table_description(cursor, table_name) if field.pk]
         return pks[0] if pks else None
@@ -115,11 +225,9 @@ class DatabaseIntrospection(BaseDatabaseIntrospection):
         Return a dictionary of {field_name: (field_name_other_table, other_table)}
         representing all foreign keys in the given table.
         """
-        table_name = self.connection.ops.quote_name(table_name)
-        cursor.execute(f'SHOW IMPORTED KEYS IN TABLE {table_name}')
         return {
             self.identifier_converter(row[8]): (self.identifier_converter(row[4]), self.identifier_converter(row[3]))
-            for row in cursor.fetchall()
+            for row in self._get_rows(cursor, table_name, 'imported_keys', 'SHOW IMPORTED KEYS IN TABLE %s')
         }
 
     def get_field_type(self, data_type, description):
@@ -135,8 +243,11 @@ class DatabaseIntrospection(BaseDatabaseIntrospection):
                 field_type = 'SmallIntegerField'
             elif description.precision == 10:
                 field_type = 'IntegerField'
-        # Handle AutoField and variants.
-        if description.default and 'IDENTITY' in description.default:
+        # Handle AutoField and variants (created with AUTOINCREMENT or with a
+        # sequence default if PK_ALLOCATION_BLOCK_SIZE is set).
+        if description.default and (
+            'IDENTITY' in description.default or description.default.upper().endswith('.NEXTVAL')
+        ):
             if field_type == 'IntegerField':
                 return 'AutoField'
             elif field_type == 'BigIntegerField':
@@ -146,8 +257,7 @@ class DatabaseIntrospection(BaseDatabaseIntrospection):
         return field_type
 
     def get_table_description(self, cursor, table_name):
-        cursor.execute('DESCRIBE TABLE %s' % self.connection.ops.quote_name(table_name))
-        table_info = cursor.fetchall()
+        table_info = self._get_rows(cursor, table_name, 'columns', 'DESCRIBE TABLE %s')
         return [
             FieldInfo(
                 # name, type_code, display_size,
@@ -182,8 +292,22 @@ class DatabaseIntrospection(BaseDatabaseIntrospection):
         return name.lower()
 
     def get_table_list(self, cursor):
+        # SHOW TABLES includes dynamic tables and SHOW VIEWS includes
+        # materialized views, so that inspectdb generates models for them.
         cursor.execute('SHOW TERSE TABLES')
         tables = [TableInfo(self.identifier_converter(row[1]), 't') for row in cursor.fetchall()]
         cursor.execute('SHOW TERSE VIEWS')
         views = [TableInfo(self.identifier_converter(row[1]), 'v') for row in cursor.fetchall()]
         return tables + views
+
+    def django_table_names(self, only_existing=False, include_views=True):
+        # The dynamic tables and materialized views of models with the
+        # snowflake_object option can't be flushed like tables.
+        excluded = {
+            model._meta.db_table for model in self.get_migratable_models()
+            if getattr(model._meta, 'snowflake_object', None) is not None
+        }
+        return [
+            table_name for table_name in super().django_table_names(only_existing, include_views)
+            if table_name not in excluded
+        ]
@@ -0,0 +1,143 @@
+import json
+
+from django.db import NotSupportedError
+from django.db.models import JSONField
+from django.db.models.fields.json import (
+    ContainedBy, DataContains, HasKeyLookup, JSONExact, JSONIContains,
+    KeyTextTransform, KeyTransform, KeyTransformIn,
+)
+
+# JSONField values are sent as JSON text and parsed into VARIANT.
+json_placeholder = 'PARSE_JSON(%s)'
+
+
+def compile_json_path(key_transforms):
+    """
+    Return a Snowflake path (e.g. '"a"."b"[0]') for GET_PATH(). Keys are
+    quoted so that they may contain any character.
+    """
+    path = []
+    for key in key_transforms:
+        try:
+            num = int(key)
+        except ValueError:
+            path.append('.' + json.dumps(key))
+        else:
+            path.append('[%s]' % num)
+    return ''.join(path).lstrip('.')
+
+
+def json_field_placeholder(self, value, compiler, connection):
+    if connection.vendor == 'snowflake':
+        return json_placeholder
+    return '%s'
+
+
+def key_transform(self, compiler, connection):
+    lhs, params, key_transforms = self.preprocess_lhs(compiler, connection)
+    return 'GET_PATH(%s, %%s)' % lhs, (*params, compile_json_path(key_transforms))
+
+
+def key_text_transform(self, compiler, connection):
+    # Scalars are extracted without quotes.
+    sql, params = key_transform(self, compiler, connection)
+    return '%s::VARCHAR' % sql, params
+
+
+def has_key_lookup(self, compiler, connection):
+    if isinstance(self.lhs, KeyTransform):
+        lhs, lhs_params, lhs_key_transforms = self.lhs.preprocess_lhs(compiler, connection)
+    else:
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        lhs_key_transforms = []
+    keys = self.rhs if isinstance(self.rhs, (list, tuple)) else [self.rhs]
+    conditions, params = [], []
+    for key in keys:
+        if isinstance(key, KeyTransform):
+            *_, rhs_key_transforms = key.preprocess_lhs(compiler, connection)
+        else:
+            rhs_key_transforms = [key]
+        # GET_PATH() returns SQL NULL for a missing key and a VARIANT null for
+        # a JSON null.
+        conditions.append('GET_PATH(%s, %%s) IS NOT NULL' % lhs)
+        params.extend((*lhs_params, compile_json_path([*lhs_key_transforms, *rhs_key_transforms])))
+    if len(conditions) == 1:
+        return conditions[0], params
+    return '(%s)' % self.logical_operator.join(conditions), params
+
+
+def json_exact(self, compiler, connection):
+    lhs, lhs_params = self.process_lhs(compiler, connection)
+    rhs, rhs_params = self.process_rhs(compiler, connection)
+    if rhs == '%s':
+        rhs = json_placeholder
+    return '%s = %s' % (lhs, rhs), (*lhs_params, *rhs_params)
+
+
+def key_transform_in(self, compiler, connection):
+    lhs, lhs_params = self.process_lhs(compiler, connection)
+    rhs, rhs_params = self.process_rhs(compiler, connection)
+    if self.rhs_is_direct_value():
+        rhs = '(%s)' % ', '.join([json_placeholder] * len(rhs_params))
+    return '%s IN %s' % (lhs, rhs), (*lhs_params, *rhs_params)
+
+
+def json_icontains(self, compiler, connection):
+    # Match the JSON text of the value.
+    lhs, lhs_params = self.process_lhs(compiler, connection)
+    rhs, rhs_params = self.process_rhs(compiler, connection)
+    return 'TO_JSON(%s) %s' % (lhs, self.get_rhs_op(connection, rhs)), (*lhs_params, *rhs_params)
+
+
+def contains_sql(lhs, lhs_params, value):
+    """
+    Return SQL that's true if the VARIANT `lhs` contains `value` (with the
+    semantics of PostgreSQL's @> operator).
+    """
+    if isinstance(value, dict):
+        conditions = ['IS_OBJECT(%s)' % lhs]
+        params = list(lhs_params)
+        for key, item in value.items():
+            item_sql, item_params = contains_sql(
+                'GET_PATH(%s, %%s)' % lhs, (*lhs_params, compile_json_path([key])), item,
+            )
+            conditions.append(item_sql)
+            params.extend(item_params)
+        return '(%s)' % ' AND '.join(conditions), params
+    if isinstance(value, list):
+        conditions = ['IS_ARRAY(%s)' % lhs]
+        params = list(lhs_params)
+        for item in value:
+            # Objects and arrays in an array must be equal to an element of
+            # the array rather than be contained by one.
+            conditions.append('ARRAY_CONTAINS(%s, %s::ARRAY)' % (json_placeholder, lhs))
+            params.extend((json.dumps(item), *lhs_params))
+        return '(%s)' % ' AND '.join(conditions), params
+    # A scalar contains an equal scalar and an array contains its elements.
+    return (
+        'ARRAY_CONTAINS(%s, TO_ARRAY(%s))' % (json_placeholder, lhs),
+        (json.dumps(value), *lhs_params),
+    )
+
+
+def data_contains(self, compiler, connection):
+    if hasattr(self.rhs, 'resolve_expression'):
+        raise NotSupportedError('contains lookup with an expression is not supported on Snowflake.')
+    lhs, lhs_params = self.process_lhs(compiler, connection)
+    return contains_sql(lhs, lhs_params, json.loads(self.rhs))
+
+
+def contained_by(self, compiler, connection):
+    raise NotSupportedError('contained_by lookup is not supported on Snowflake.')
+
+
+def register_lookups():
+    JSONField.get_placeholder = json_field_placeholder
+    KeyTransform.as_snowflake = key_transform
+    KeyTextTransform.as_snowflake = key_text_transform
+    HasKeyLookup.as_snowflake = has_key_lookup
+    JSONExact.as_snowflake = json_exact
+    KeyTransformIn.as_snowflake = key_transform_in
+    JSONIContains.as_snowflake = json_icontains
+    DataContains.as_snowflake = data_contains
+    ContainedBy.as_snowflake = contained_by
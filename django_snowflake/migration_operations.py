@@ -0,0 +1,157 @@
+from django.db import router
+from django.db.migrations.operations.base import Operation
+
+from .tables import DynamicTable, MaterializedView
+
+
+class SnowflakeObjectOperation(Operation):
+    """
+    Base class for operations on dynamic tables and materialized views. Like
+    RunSQL, they don't change the migration state: use an unmanaged model
+    (Meta.managed = False) with the same db_table to query the table (or a
+    managed model with Meta.snowflake_object instead of these operations).
+    `name` is the table name.
+    """
+    reduces_to_sql = True
+
+    def __init__(self, name, hints=None):
+        self.name = name
+        self.hints = hints or {}
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def allowed(self, app_label, schema_editor):
+        return router.allow_migrate(schema_editor.connection.alias, app_label, **self.hints)
+
+    @property
+    def migration_name_fragment(self):
+        return '%s_%s' % (self.__class__.__name__.lower(), self.name.lower().strip('"'))
+
+
+class CreateSnowflakeObject(SnowflakeObjectOperation):
+    reversible = True
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if self.allowed(app_label, schema_editor):
+            from_state.clear_delayed_apps_cache()
+            schema_editor.execute(*self.snowflake_object.create_sql(self.name, schema_editor, from_state.apps))
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if self.allowed(app_label, schema_editor):
+            schema_editor.execute(self.snowflake_object.delete_sql(self.name, schema_editor))
+
+
+class DropSnowflakeObject(SnowflakeObjectOperation):
+    # Without a query, the object can't be recreated.
+    snowflake_object = None
+
+    @property
+    def reversible(self):
+        return self.snowflake_object is not None
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if self.allowed(app_label, schema_editor):
+            schema_editor.execute(self.object_class.delete_sql(self.name, schema_editor))
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if self.snowflake_object is None:
+            raise NotImplementedError('You cannot reverse this operation without a query.')
+        if self.allowed(app_label, schema_editor):
+            to_state.clear_delayed_apps_cache()
+            schema_editor.execute(*self.snowflake_object.create_sql(self.name, schema_editor, to_state.apps))
+
+
+class CreateDynamicTable(CreateSnowflakeObject):
+    """
+    Create a dynamic table from a query: SQL or a function that takes an app
+    registry of the historical models and returns a QuerySet.
+    """
+    def __init__(self, name, query, target_lag, warehouse, hints=None):
+        super().__init__(name, hints)
+        self.snowflake_object = DynamicTable(query, target_lag=target_lag, warehouse=warehouse)
+
+    def describe(self):
+        return 'Create dynamic table %s' % self.name
+
+
+class AlterDynamicTable(SnowflakeObjectOperation):
+    """
+    Change a dynamic table's target lag and/or warehouse. To be reversible,
+    the old value of each changed option must be given.
+    """
+    def __init__(self, name, target_lag=None, warehouse=None, old_target_lag=None,
+                 old_warehouse=None, hints=None):
+        if target_lag is None and warehouse is None:
+            raise ValueError('AlterDynamicTable requires target_lag or warehouse.')
+        super().__init__(name, hints)
+        self.target_lag = target_lag
+        self.warehouse = warehouse
+        self.old_target_lag = old_target_lag
+        self.old_warehouse = old_warehouse
+
+    @property
+    def reversible(self):
+        return (
+            (self.target_lag is None or self.old_target_lag is not None) and
+            (self.warehouse is None or self.old_warehouse is not None)
+        )
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if self.allowed(app_label, schema_editor):
+            schema_editor.execute(DynamicTable.alter_sql(
+                self.name, schema_editor, target_lag=self.target_lag, warehouse=self.warehouse,
+            ))
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if not self.reversible:
+            raise NotImplementedError('You cannot reverse this operation without the old values.')
+        if self.allowed(app_label, schema_editor):
+            schema_editor.execute(DynamicTable.alter_sql(
+                self.name, schema_editor, target_lag=self.old_target_lag, warehouse=self.old_warehouse,
+            ))
+
+    def describe(self):
+        return 'Alter dynamic table %s' % self.name
+
+
+class DropDynamicTable(DropSnowflakeObject):
+    """
+    Drop a dynamic table. To be reversible, its query, target lag, and
+    warehouse must be given.
+    """
+    object_class = DynamicTable
+
+    def __init__(self, name, query=None, target_lag=None, warehouse=None, hints=None):
+        super().__init__(name, hints)
+        if query is not None:
+            self.snowflake_object = DynamicTable(query, target_lag=target_lag, warehouse=warehouse)
+
+    def describe(self):
+        return 'Drop dynamic table %s' % self.name
+
+
+class CreateMaterializedView(CreateSnowflakeObject):
+    """
+    Create a materialized view from a query: SQL or a function that takes an
+    app registry of the historical models and returns a QuerySet.
+    """
+    def __init__(self, name, query, hints=None):
+        super().__init__(name, hints)
+        self.snowflake_object = MaterializedView(query)
+
+    def describe(self):
+        return 'Create materialized view %s' % self.name
+
+
+class DropMaterializedView(DropSnowflakeObject):
+    """Drop a materialized view. To be reversible, its query must be given."""
+    object_class = MaterializedView
+
+    def __init__(self, name, query=None, hints=None):
+        super().__init__(name, hints)
+        if query is not None:
+            self.snowflake_object = MaterializedView(query)
+
+    def describe(self):
+        return 'Drop materialized view %s' % self.name
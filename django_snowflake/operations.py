@@ -1,12 +1,25 @@
 import decimal
+import logging
+import re
 import uuid
 
 from django.conf import settings
 from django.db.backends.base.operations import BaseDatabaseOperations
 from django.utils import timezone
+from django.utils.regex_helper import _lazy_re_compile
+
+from .lookups import json_placeholder
+from .timeouts import QueryTimeout
+from .utils import wait_for_queries
+
+logger = logging.getLogger('django.db.backends')
+
+# Matches the table of a statement from DatabaseOperations.sql_flush().
+flushed_table_re = _lazy_re_compile(r'\b(?:TRUNCATE|FROM)\s+("[^"]+")', re.IGNORECASE)
 
 
 class DatabaseOperations(BaseDatabaseOperations):
+    compiler_module = 'django_snowflake.compiler'
     cast_char_field_without_max_length = 'varchar'
     cast_data_types = {
         'AutoField': 'NUMBER',
@@ -14,12 +27,92 @@ class DatabaseOperations(BaseDatabaseOperations):
         'SmallAutoField': 'NUMBER',
     }
     explain_prefix = 'EXPLAIN USING'
+    # The alias of the new rows in the MERGE statements of bulk_create() and
+    # SnowflakeQuerySet.bulk_update().
+    merge_source_alias = 'DJANGO_SOURCE'
+    # Snowflake's limit on the length of a statement (after parameters are
+    # interpolated by the connector) is 1 MB. Leave room for the statement's
+    # other clauses and for values whose length is underestimated.
+    max_statement_size = 900 * 1024
+    # The format of the files written by SQLInsertCompiler.execute_staged_insert().
+    # Every value is enclosed in quotes and unquoted empty fields are NULL.
+    stage_file_format = (
+        "TYPE=CSV COMPRESSION=GZIP FIELD_OPTIONALLY_ENCLOSED_BY='\"' "
+        "EMPTY_FIELD_AS_NULL=TRUE NULL_IF=() ESCAPE_UNENCLOSED_FIELD=NONE "
+        "BINARY_FORMAT=HEX"
+    )
+    # The temporary file format (created when connecting) with which
+    # SQLInsertCompiler.execute_staged_merge() queries staged files.
+    stage_file_format_name = 'DJANGO_STAGE_FILE_FORMAT'
 
     def bulk_insert_sql(self, fields, placeholder_rows):
         placeholder_rows_sql = (', '.join(row) for row in placeholder_rows)
         values_sql = ', '.join('(%s)' % sql for sql in placeholder_rows_sql)
         return 'VALUES ' + values_sql
 
+    def values_select_sql(self, fields, placeholder_rows, aliases=False):
+        """
+        Return a query of the rows of placeholders (SELECT ... FROM VALUES)
+        with a column for each field, named after it if aliases=True (VALUES
+        names its columns COLUMN1, COLUMN2, etc.). Since VALUES only accepts
+        constants, JSONField values are parsed by the SELECT.
+        """
+        placeholder_rows = [list(row) for row in placeholder_rows]
+        columns = []
+        for i, field in enumerate(fields):
+            column = 'COLUMN%d' % (i + 1)
+            if all(row[i] == json_placeholder for row in placeholder_rows):
+                for row in placeholder_rows:
+                    row[i] = '%s'
+                column = json_placeholder % column
+            if aliases:
+                column = '%s AS %s' % (column, self.quote_name(field.column))
+            columns.append(column)
+        return 'SELECT %s FROM %s' % (', '.join(columns), self.bulk_insert_sql(fields, placeholder_rows))
+
+    def bulk_update_batches(self, value_rows, batch_size=None):
+        """
+        Split the rows of values into batches whose interpolated VALUES fit in
+        a statement of max_statement_size, with at most batch_size rows.
+        """
+        batch, size = [], 0
+        for row in value_rows:
+            # Values are quoted (binary values are hex encoded) and followed
+            # by a comma and a space.
+            row_size = sum(
+                2 * len(value) + 6 if isinstance(value, (bytes, bytearray, memoryview)) else len(str(value)) + 4
+                for value in row
+            ) + 4
+            if batch and (size + row_size > self.max_statement_size or len(batch) == batch_size):
+                yield batch
+                batch, size = [], 0
+            batch.append(row)
+            size += row_size
+        if batch:
+            yield batch
+
+    def bulk_update_merge_sql(self, table, pk, fields, value_rows):
+        """
+        Return the MERGE statement (and its parameters) of a batch of
+        SnowflakeQuerySet.bulk_update(): each row has the primary key and
+        then the values of the fields.
+        """
+        qn = self.quote_name
+        table = qn(table)
+        alias = qn(self.merge_source_alias)
+        placeholder_rows = [
+            [json_placeholder if field.get_internal_type() == 'JSONField' else '%s' for field in [pk, *fields]]
+        ] * len(value_rows)
+        sql = 'MERGE INTO %(table)s USING (%(source)s) AS %(alias)s ON %(table)s.%(pk)s = %(alias)s.%(pk)s '
+        sql += 'WHEN MATCHED THEN UPDATE SET %(updates)s'
+        return sql % {
+            'table': table,
+            'source': self.values_select_sql([pk, *fields], placeholder_rows, aliases=True),
+            'alias': alias,
+            'pk': qn(pk.column),
+            'updates': ', '.join('%s = %s.%s' % (qn(field.column), alias, qn(field.column)) for field in fields),
+        }, [value for row in value_rows for value in row]
+
     def combine_expression(self, connector, sub_expressions):
         lhs, rhs = sub_expressions
         if connector == '&':
@@ -184,6 +277,55 @@ class DatabaseOperations(BaseDatabaseOperations):
             )
         return sql
 
+    def execute_sql_flush(self, sql_list):
+        creation = self.connection.creation
+        if creation.snapshot_tables:
+            tables = {m[1] for m in map(flushed_table_re.search, sql_list) if m}
+            # Restoring the snapshot of the test schema takes a couple of
+            # statements regardless of the number of tables.
+            if tables >= creation.snapshot_tables:
+                creation.restore_snapshot()
+                return
+        options = self.connection.settings_dict.get('CONCURRENT_FLUSH')
+        # Asynchronous queries aren't part of a transaction.
+        if options and len(sql_list) > 1 and not self.connection.in_atomic_block:
+            self.execute_sql_flush_concurrently(sql_list, **({} if options is True else {
+                name.lower(): value for name, value in options.items()
+            }))
+            return
+        super().execute_sql_flush(sql_list)
+
+    def execute_sql_flush_concurrently(self, sql_list, timeout=None):
+        """
+        Execute the statements of sql_flush() as asynchronous queries so that
+        Snowflake runs them in parallel. Cancel them and raise QueryTimeout
+        if they don't finish within `timeout` seconds.
+        """
+        def progress(finished, total):
+            logger.debug('Flushed %d of %d tables.', finished, total)
+
+        with self.connection.cursor() as cursor, self.connection.wrap_database_errors:
+            query_ids = []
+            for sql in sql_list:
+                logger.debug('%s (async)', sql, extra={'sql': sql, 'params': None})
+                cursor.cursor.execute_async(sql)
+                query_ids.append(cursor.cursor.sfqid)
+            running = query_ids
+            try:
+                running = wait_for_queries(self.connection.connection, query_ids, timeout, progress=progress)
+            finally:
+                for query_id in running:
+                    cursor.execute('SELECT SYSTEM$CANCEL_QUERY(%s)', [query_id])
+                # The cursor's result cache doesn't see asynchronous queries.
+                if self.connection.result_cache is not None:
+                    self.connection.result_cache.invalidate()
+        if running:
+            raise QueryTimeout(
+                'Flushing the database timed out after %s seconds. %d of %d statements were canceled.' % (
+                    timeout, len(running), len(query_ids),
+                )
+            )
+
     def subtract_temporals(self, internal_type, lhs, rhs):
         lhs_sql, lhs_params = lhs
         rhs_sql, rhs_params = rhs
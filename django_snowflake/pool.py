@@ -0,0 +1,204 @@
+import json
+import threading
+import time
+from collections import deque
+
+import snowflake.connector as Database
+
+# {key of the connection parameters: ConnectionPool}
+pools = {}
+pools_lock = threading.Lock()
+
+
+def get_pool(conn_params, options):
+    """
+    Return the pool of connections with the given connect() parameters,
+    creating (and warming up) it if needed.
+    """
+    key = json.dumps(conn_params, sort_keys=True, default=str)
+    with pools_lock:
+        pool = pools.get(key)
+        if pool is None:
+            pool = pools[key] = ConnectionPool(conn_params, **{
+                name.lower(): value for name, value in options.items()
+            })
+            new = True
+        else:
+            new = False
+    if new:
+        pool.warm_up()
+    return pool
+
+
+def close_pools():
+    """Close the idle connections of all pools (e.g. at shutdown)."""
+    with pools_lock:
+        for pool in pools.values():
+            pool.close()
+
+
+class ConnectionPool:
+    """
+    A process-wide pool of connections with the same connect() parameters.
+
+    - min_size: The number of connections opened by warm_up().
+    - max_size: The maximum number of connections, idle or in use. acquire()
+      waits up to `timeout` seconds for a connection to be released.
+    - max_age: The number of seconds after which a connection is closed
+      rather than reused.
+    - idle_check: The number of seconds that a connection may be idle before
+      it's checked with a query when acquired.
+    """
+    def __init__(self, conn_params, min_size=0, max_size=10, max_age=3600, idle_check=60, timeout=30):
+        self.conn_params = conn_params
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_age = max_age
+        self.idle_check = idle_check
+        self.timeout = timeout
+        self.lock = threading.Condition()
+        # (connection, session parameters, created time, released time)
+        # tuples, the most recently released last.
+        self.idle = deque()
+        # {connection in use: created time}
+        self.in_use = {}
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.discarded = 0
+        self.waits = 0
+        self.wait_time = 0.0
+
+    def stats(self):
+        """Return counters for monitoring the pool."""
+        with self.lock:
+            return {
+                'size': self.size,
+                'idle': len(self.idle),
+                'in_use': len(self.in_use),
+                'hits': self.hits,
+                'misses': self.misses,
+                'discarded': self.discarded,
+                'waits': self.waits,
+                'wait_time': self.wait_time,
+            }
+
+    def connect(self):
+        connection = Database.connect(**self.conn_params)
+        return connection, dict(self.conn_params.get('session_parameters', {})), time.monotonic()
+
+    def warm_up(self):
+        """Open connections until the pool has min_size of them."""
+        while True:
+            with self.lock:
+                if self.size >= self.min_size:
+                    return
+                self.size += 1
+            try:
+                connection, session_parameters, created = self.connect()
+            except Exception:
+                with self.lock:
+                    self.size -= 1
+                    self.lock.notify()
+                raise
+            with self.lock:
+                self.idle.append((connection, session_parameters, created, time.monotonic()))
+                self.lock.notify()
+
+    def acquire(self):
+        """
+        Return a (connection, session parameters) tuple, reusing an idle
+        connection if possible. The session parameters are those of the
+        connection when it was released.
+        """
+        while True:
+            with self.lock:
+                if not self.idle and self.size >= self.max_size:
+                    self.waits += 1
+                    start = time.monotonic()
+                    available = self.lock.wait_for(
+                        lambda: self.idle or self.size < self.max_size, self.timeout,
+                    )
+                    self.wait_time += time.monotonic() - start
+                    if not available:
+                        raise Database.OperationalError(
+                            msg='Timed out after %s seconds waiting for a connection '
+                                'from the pool.' % self.timeout
+                        )
+                if self.idle:
+                    connection, session_parameters, created, released = self.idle.pop()
+                else:
+                    connection = None
+                    self.size += 1
+                    self.misses += 1
+            if connection is None:
+                try:
+                    connection, session_parameters, created = self.connect()
+                except Exception:
+                    with self.lock:
+                        self.size -= 1
+                        self.lock.notify()
+                    raise
+                with self.lock:
+                    self.in_use[connection] = created
+                return connection, session_parameters
+            now = time.monotonic()
+            # Only check the liveness of connections that have been idle for
+            # a while.
+            if now - created < self.max_age and (
+                now - released < self.idle_check or self.is_alive(connection)
+            ):
+                with self.lock:
+                    self.hits += 1
+                    self.in_use[connection] = created
+                return connection, session_parameters
+            self.discard(connection)
+
+    def release(self, connection, session_parameters, discard=False):
+        """
+        Return a connection to the pool. Close it instead if `discard` is
+        True or if it's too old.
+        """
+        with self.lock:
+            created = self.in_use.pop(connection, None)
+        if created is None:
+            # The connection isn't from this pool.
+            connection.close()
+            return
+        if (
+            discard or connection.is_closed() or
+            time.monotonic() - created >= self.max_age
+        ):
+            self.discard(connection)
+            return
+        with self.lock:
+            self.idle.append((connection, dict(session_parameters), created, time.monotonic()))
+            self.lock.notify()
+
+    def discard(self, connection):
+        with self.lock:
+            self.in_use.pop(connection, None)
+            self.size -= 1
+            self.discarded += 1
+            self.lock.notify()
+        try:
+            connection.close()
+        except Database.Error:
+            pass
+
+    def is_alive(self, connection):
+        if connection.is_closed():
+            return False
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except Database.Error:
+            return False
+        return True
+
+    def close(self):
+        """Close the idle connections."""
+        with self.lock:
+            idle, self.idle = self.idle, deque()
+        for connection, *_ in idle:
+            self.discard(connection)
@@ -0,0 +1,292 @@
+from django.core.exceptions import EmptyResultSet, FieldError
+from django.db import NotSupportedError, connections, models, transaction
+from django.db.models import sql
+
+from .arrow import check_pyarrow, convert_table
+from .async_queries import get_async_connection
+from .explain import parse_plan
+from .timeouts import timeout_options
+
+
+class SnowflakeQuerySet(models.QuerySet):
+    """A QuerySet with Snowflake-specific methods."""
+
+    def execution_options(self, **options):
+        """
+        Return a new QuerySet whose queries are executed with the given
+        options (see DatabaseWrapper.execution_options()).
+        """
+        clone = self._chain()
+        current_options = getattr(self.query, 'snowflake_options', {})
+        clone.query.snowflake_options = {
+            **current_options,
+            **options,
+            'session_parameters': {
+                **current_options.get('session_parameters', {}),
+                **options.get('session_parameters', {}),
+            },
+        }
+        return clone
+
+    def stream(self, prefetch_chunks=2, prefetch_threads=None, result_chunk_size=None):
+        """
+        Make iterator() fetch up to `prefetch_chunks` chunks ahead of the
+        caller in a background thread. `prefetch_threads` and
+        `result_chunk_size` (in MB) set the CLIENT_PREFETCH_THREADS and
+        CLIENT_RESULT_CHUNK_SIZE session parameters for the query.
+        """
+        session_parameters = {}
+        if prefetch_threads is not None:
+            session_parameters['CLIENT_PREFETCH_THREADS'] = prefetch_threads
+        if result_chunk_size is not None:
+            session_parameters['CLIENT_RESULT_CHUNK_SIZE'] = result_chunk_size
+        return self.execution_options(prefetch_chunks=prefetch_chunks, session_parameters=session_parameters)
+
+    def timeout(self, seconds):
+        """
+        Return a new QuerySet whose queries are canceled by Snowflake (and
+        raise QueryTimeout) if they run for longer than `seconds`.
+        """
+        return self.execution_options(**timeout_options(seconds))
+
+    def using_warehouse(self, name):
+        """
+        Return a new QuerySet whose queries are executed on the warehouse with
+        the given name in the 'WAREHOUSES' setting.
+        """
+        return self.execution_options(**connections[self.db].warehouse_options(name))
+
+    def explain_plan(self, **options):
+        """
+        Return the ExplainPlan of the QuerySet's query (from EXPLAIN USING
+        JSON) with its operators and partition pruning statistics.
+        """
+        return parse_plan(self.explain(format='JSON', **options))
+
+    def bulk_create(self, objs, batch_size=None, ignore_conflicts=False,
+                    update_conflicts=False, update_fields=None, unique_fields=None):
+        """
+        Like QuerySet.bulk_create() but also allow upserts (as in Django 4.1):
+        if update_conflicts=True, rows whose unique_fields match an existing
+        row update its update_fields instead. Conflicts are resolved with a
+        MERGE statement for each batch.
+        """
+        objs = list(objs)
+        connection = connections[self.db]
+        threshold = connection.settings_dict.get('BULK_INSERT_STAGE_THRESHOLD')
+        if (ignore_conflicts or update_conflicts) and threshold and len(objs) >= threshold:
+            # Create the file format for staged merges before bulk_create()
+            # starts a transaction (if not in one already).
+            connection.ensure_stage_file_format()
+        if not update_conflicts:
+            return super().bulk_create(objs, batch_size, ignore_conflicts)
+        if ignore_conflicts:
+            raise ValueError('ignore_conflicts and update_conflicts are mutually exclusive.')
+        if not update_fields:
+            raise ValueError('Fields that will be updated when a row insertion fails on conflicts must be provided.')
+        if not unique_fields:
+            raise ValueError('Unique fields that can trigger the upsert must be provided.')
+        opts = self.model._meta
+        update_fields = [opts.get_field(name) for name in update_fields]
+        if any(not field.concrete or field.many_to_many or field.primary_key for field in update_fields):
+            raise ValueError(
+                'bulk_create() can only be used with concrete fields in update_fields and '
+                'not with primary key fields.'
+            )
+        unique_fields = [opts.pk if name == 'pk' else opts.get_field(name) for name in unique_fields]
+        if any(not field.concrete or field.many_to_many for field in unique_fields):
+            raise ValueError('bulk_create() can only be used with concrete fields in unique_fields.')
+        # Read by _insert().
+        self._conflict_fields = (update_fields, unique_fields)
+        try:
+            return super().bulk_create(objs, batch_size, ignore_conflicts=True)
+        finally:
+            del self._conflict_fields
+
+    def _insert(self, objs, fields, returning_fields=None, raw=False, using=None, ignore_conflicts=False):
+        self._for_write = True
+        if using is None:
+            using = self.db
+        query = sql.InsertQuery(self.model, ignore_conflicts=ignore_conflicts)
+        query.update_fields, query.unique_fields = getattr(self, '_conflict_fields', (None, None))
+        query.insert_values(fields, objs, raw=raw)
+        return query.get_compiler(using=using).execute_sql(returning_fields)
+
+    _insert.alters_data = True
+    _insert.queryset_only = False
+
+    def bulk_update(self, objs, fields, batch_size=None):
+        """
+        Like QuerySet.bulk_update() but update each batch with a MERGE
+        statement that joins the table with the batch's VALUES rather than
+        with an UPDATE of CASE expressions with a WHEN for each object, which
+        is slow to compile. Batches are limited by the size of the statement
+        rather than by the number of parameters. QuerySets that are filtered
+        and values that are expressions use QuerySet.bulk_update().
+        """
+        if batch_size is not None and batch_size < 0:
+            raise ValueError('Batch size must be a positive integer.')
+        if not fields:
+            raise ValueError('Field names must be given to bulk_update().')
+        objs = tuple(objs)
+        if any(obj.pk is None for obj in objs):
+            raise ValueError('All bulk_update() objects must have a primary key set.')
+        opts = self.model._meta
+        update_fields = [opts.get_field(name) for name in fields]
+        if any(not field.concrete or field.many_to_many for field in update_fields):
+            raise ValueError('bulk_update() can only be used with concrete fields.')
+        if any(field.primary_key for field in update_fields):
+            raise ValueError('bulk_update() cannot be used with primary key fields.')
+        if not objs:
+            return 0
+        if (
+            self.query.has_filters() or
+            # Fields of multi-table inheritance parents are in other tables.
+            any(field.model._meta.db_table != opts.db_table for field in update_fields) or
+            any(hasattr(getattr(obj, field.attname), 'resolve_expression') for obj in objs for field in update_fields)
+        ):
+            return super().bulk_update(objs, fields, batch_size)
+        self._for_write = True
+        connection = connections[self.db]
+        # As with the CASE expressions of QuerySet.bulk_update(), the first
+        # object with a given primary key wins.
+        rows_by_pk = {}
+        for obj in objs:
+            if obj.pk not in rows_by_pk:
+                rows_by_pk[obj.pk] = [
+                    field.get_db_prep_save(getattr(obj, field.attname), connection)
+                    for field in [opts.pk, *update_fields]
+                ]
+        rows_updated = 0
+        with transaction.atomic(using=self.db, savepoint=False), connection.cursor() as cursor:
+            for batch in connection.ops.bulk_update_batches(list(rows_by_pk.values()), batch_size):
+                cursor.execute(*connection.ops.bulk_update_merge_sql(opts.db_table, opts.pk, update_fields, batch))
+                rows_updated += cursor.rowcount
+        return rows_updated
+
+    bulk_update.alters_data = True
+
+    async def fetch_async(self):
+        """
+        Execute the query with a Snowflake asynchronous query, polled from the
+        event loop (see django_snowflake.async_queries), and return a list of
+        the QuerySet's results. prefetch_related() isn't supported since it
+        requires additional queries. With timeout(), the query is canceled
+        with SYSTEM$CANCEL_QUERY if it doesn't finish in time.
+        """
+        options = getattr(self.query, 'snowflake_options', {})
+        if options.get('warehouse') is not None:
+            # The async connection's session is shared by all coroutines, so
+            # it can't switch warehouses.
+            raise NotSupportedError('fetch_async() does not support using_warehouse().')
+        session_parameters = dict(options.get('session_parameters', {}))
+        if 'timeout' in options:
+            # Enforced by the client instead.
+            session_parameters.pop('STATEMENT_TIMEOUT_IN_SECONDS', None)
+        if session_parameters:
+            # The async connection's session is shared by all coroutines.
+            raise NotSupportedError('fetch_async() does not support session parameters.')
+        try:
+            sql, params = self.query.get_compiler(self.db).as_sql()
+        except EmptyResultSet:
+            return []
+        rows = await get_async_connection(self.db).execute(sql, params, options.get('timeout'))
+        clone = self.execution_options(results=rows)
+        # The ORM's result processing doesn't make any queries.
+        return list(clone)
+
+    def _arrow_columns(self, compiler):
+        """
+        Return the names of the query's columns (as in values()) and the
+        internal types of their fields (None if the type is unknown).
+        """
+        query = compiler.query
+        select = compiler.select[:compiler.col_count]
+        names = [*query.extra_select, *query.values_select, *query.annotation_select]
+        if not query.values_select:
+            # The model's columns follow the extra columns.
+            start, end = len(query.extra_select), len(select) - len(query.annotation_select)
+            names[start:start] = [expression.target.attname for expression, _, _ in select[start:end]]
+        internal_types = []
+        for expression, _, _ in select:
+            try:
+                field = expression.output_field
+            except FieldError:
+                internal_types.append(None)
+                continue
+            # Foreign keys have the type of the field they refer to.
+            while getattr(field, 'target_field', None) is not None:
+                field = field.target_field
+            internal_types.append(field.get_internal_type())
+        return names, internal_types
+
+    def _execute_arrow(self, feature):
+        """
+        Execute the query and return a cursor for fetching its results in
+        Arrow format (None if the query can't return any rows) and the names
+        and internal types of its columns.
+        """
+        check_pyarrow(feature)
+        clone = self._chain()
+        # Related models' columns would follow the model's.
+        clone.query.select_related = False
+        compiler = clone.query.get_compiler(clone.db)
+        try:
+            sql, params = compiler.as_sql()
+        except EmptyResultSet:
+            return None, self._arrow_columns(compiler)
+        connection = compiler.connection
+        cursor = connection.cursor()
+        try:
+            # The connector's cursor must execute the query.
+            options = {**getattr(clone.query, 'snowflake_options', {}), 'result_cache': False}
+            with connection.execution_options(**options):
+                cursor.execute(sql, params)
+        except Exception:
+            cursor.close()
+            raise
+        return cursor, self._arrow_columns(compiler)
+
+    def to_arrow(self):
+        """
+        Return the QuerySet's results as a pyarrow.Table with a column for
+        each field (as in values()). Rather than creating model instances and
+        applying database converters to each value, the connector's Arrow
+        results are converted a column at a time.
+        """
+        cursor, (names, internal_types) = self._execute_arrow('SnowflakeQuerySet.to_arrow()')
+        if cursor is None:
+            table = None
+        else:
+            with cursor:
+                table = cursor.fetch_arrow_all()
+        return convert_table(table, names, internal_types, connections[self.db])
+
+    def to_pandas(self):
+        """Return the QuerySet's results as a pandas.DataFrame (see to_arrow())."""
+        return self.to_arrow().to_pandas()
+
+    def arrow_batches(self):
+        """
+        Like to_arrow() but return an iterator of a pyarrow.Table for each
+        batch of results, so that results larger than memory can be
+        processed.
+        """
+        cursor, (names, internal_types) = self._execute_arrow('SnowflakeQuerySet.arrow_batches()')
+        if cursor is None:
+            return
+        connection = connections[self.db]
+        with cursor:
+            for table in cursor.fetch_arrow_batches():
+                yield convert_table(table, names, internal_types, connection)
+
+    def pandas_batches(self):
+        """
+        Like to_pandas() but return an iterator of a pandas.DataFrame for each
+        batch of results.
+        """
+        for table in self.arrow_batches():
+            yield table.to_pandas()
+
+
+SnowflakeManager = models.Manager.from_queryset(SnowflakeQuerySet)
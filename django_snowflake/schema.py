@@ -1,27 +1,256 @@
+import re
+
 from django.db import NotSupportedError
-from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+from django.db.backends.base.schema import BaseDatabaseSchemaEditor, logger
+from django.db.backends.utils import strip_quotes
+from django.utils.regex_helper import _lazy_re_compile
+
+from .indexes import SnowflakeIndex
+
+# Matches the tables altered by DDL statements.
+altered_table_re = _lazy_re_compile(
+    r'\b(?:TABLE(?:\s+IF(?:\s+NOT)?\s+EXISTS)?|RENAME\s+TO)\s+("[^"]+")', re.IGNORECASE,
+)
 
 
 class DatabaseSchemaEditor(BaseDatabaseSchemaEditor):
     sql_create_column_inline_fk = (
         'CONSTRAINT %(name)s FOREIGN KEY REFERENCES %(to_table)s(%(to_column)s)'
     )
+    sql_create_columns = 'ALTER TABLE %(table)s ADD COLUMN %(columns)s'
+    # ALTER TABLE t ALTER COLUMN a SET NOT NULL, COLUMN b SET NOT NULL
+    sql_alter_columns_not_null = 'ALTER TABLE %(table)s ALTER %(columns)s'
+    sql_not_null_column = 'COLUMN %(column)s SET NOT NULL'
+    sql_cluster_by = 'ALTER TABLE %(table)s CLUSTER BY (%(columns)s)'
+    sql_drop_clustering_key = 'ALTER TABLE %(table)s DROP CLUSTERING KEY'
+    sql_add_search_optimization = 'ALTER TABLE %(table)s ADD SEARCH OPTIMIZATION ON %(method)s(%(columns)s)'
+    sql_drop_search_optimization = 'ALTER TABLE %(table)s DROP SEARCH OPTIMIZATION ON %(method)s(%(columns)s)'
+    sql_create_sequence = 'CREATE SEQUENCE IF NOT EXISTS %(sequence)s'
+    sql_delete_sequence = 'DROP SEQUENCE IF EXISTS %(sequence)s'
+    sql_rename_sequence = 'ALTER SEQUENCE %(old_sequence)s RENAME TO %(new_sequence)s'
+    sql_alter_column_sequence_default = 'ALTER COLUMN %(column)s SET DEFAULT %(sequence)s.NEXTVAL'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # (model, field, column definition, params) of columns that
+        # add_field() has yet to add to the same table.
+        self.pending_fields = []
+        # The number of statements to send in each request, if batching.
+        self.batch_size = self.connection.settings_dict.get('DDL_BATCH_SIZE')
+        # (sql, params) of statements that execute() has yet to send.
+        self.batched_statements = []
+        # The search optimization method for db_index=True fields, if any.
+        search_optimization = self.connection.settings_dict.get('SEARCH_OPTIMIZATION')
+        self.search_optimization = 'EQUALITY' if search_optimization is True else search_optimization
+
+    def __enter__(self):
+        super().__enter__()
+        if not self.collect_sql:
+            # Add pending columns and send batched statements before any
+            # other query (e.g. introspection, a RunPython operation, or
+            # recording a migration) that may depend on them.
+            self.connection.execute_wrappers.append(self.flush_before_query)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                self.flush_pending_fields()
+                for sql in self.deferred_sql:
+                    self.execute(sql)
+                self.deferred_sql = []
+                self.flush_statements()
+        except Exception as exc:
+            # Exit the atomic block (rolling it back) without running the
+            # deferred SQL.
+            exc_type, exc_value, traceback = type(exc), exc, exc.__traceback__
+            raise
+        finally:
+            if self.flush_before_query in self.connection.execute_wrappers:
+                self.connection.execute_wrappers.remove(self.flush_before_query)
+            super().__exit__(exc_type, exc_value, traceback)
+
+    def execute(self, sql, params=()):
+        # Any other statement may depend on pending columns.
+        self.flush_pending_fields()
+        sql = str(sql).rstrip()
+        if sql.endswith(';'):
+            sql = sql[:-1]
+        if not sql:
+            # e.g. _create_index_sql() for a field that isn't indexed.
+            return
+        if (
+            self.batch_size and not self.collect_sql and
+            # Let BaseDatabaseSchemaEditor.execute() raise an error.
+            not self.connection.in_atomic_block and
+            # The statements can't be counted if one contains a semicolon
+            # (e.g. a RunSQL operation with multiple statements).
+            ';' not in sql
+        ):
+            logger.debug('%s; (params %r)', sql, params, extra={'params': params, 'sql': sql})
+            self.batched_statements.append((sql, params))
+            if len(self.batched_statements) >= self.batch_size:
+                self.flush_statements()
+        else:
+            self.flush_statements()
+            super().execute(sql, params)
+        catalog = self.connection.introspection.catalog
+        if catalog is not None and not self.collect_sql:
+            for table_name in altered_table_re.findall(str(sql)):
+                catalog.invalidate(table_name)
+
+    def flush_statements(self):
+        """
+        Send the statements batched by execute() in a multi-statement
+        request.
+        """
+        if not self.batched_statements:
+            return
+        statements, self.batched_statements = self.batched_statements, []
+        if len(statements) == 1:
+            sql, params = statements[0]
+            with self.connection.cursor() as cursor:
+                cursor.execute(sql, params)
+            return
+        # The statements' parameters are interpolated together, so escape
+        # percent signs in the statements that don't have any.
+        sql = ';\n'.join(sql if params else sql.replace('%', '%%') for sql, params in statements)
+        params = [param for _, params in statements for param in params or ()]
+        try:
+            with self.connection.cursor() as cursor, self.connection.wrap_database_errors:
+                # Bypass CursorWrapper, which doesn't accept num_statements.
+                cursor.cursor.execute(sql, params, num_statements=len(statements))
+        except Exception as exc:
+            # Snowflake stops at the first statement that fails; the ones
+            # before it are executed.
+            statements_list = '\n'.join(
+                '%d. %s; (params %r)' % (i, sql, params) for i, (sql, params) in enumerate(statements, 1)
+            )
+            # Add the batch to the message of the original exception, which
+            # keeps its type and attributes (e.g. the connector's errno).
+            message = '%s\nThe statement that failed is in this batch:\n%s' % (
+                exc.args[0] if exc.args else '', statements_list,
+            )
+            exc.args = (message, *exc.args[1:])
+            raise
+
+    def flush_before_query(self, execute, sql, params, many, context):
+        self.flush_pending_fields()
+        self.flush_statements()
+        return execute(sql, params, many, context)
+
+    def _sequence_name(self, model, field):
+        return self.quote_name('%s_%s_seq' % (strip_quotes(model._meta.db_table), strip_quotes(field.column)))
+
+    def _rename_sequence(self, model, field):
+        """
+        Rename the sequence that backs a field after its table or column is
+        renamed so that it has the name that delete_model() drops.
+        """
+        table, column = model._meta.db_table, field.column
+        with self.connection.cursor() as cursor:
+            self.connection.pk_allocator.forget(table)
+            sequence = self.connection.pk_allocator.get_sequence(cursor, table, column)
+        # The column may use AUTOINCREMENT if it was created without
+        # 'PK_ALLOCATION_BLOCK_SIZE'.
+        if sequence is None:
+            return
+        new_sequence = self._sequence_name(model, field)
+        self.execute(self.sql_rename_sequence % {'old_sequence': sequence, 'new_sequence': new_sequence})
+        # The default references the sequence by name.
+        self.execute(self.sql_alter_column % {
+            'table': self.quote_name(table),
+            'changes': self.sql_alter_column_sequence_default % {
+                'column': self.quote_name(column),
+                'sequence': new_sequence,
+            },
+        })
+        self.connection.pk_allocator.forget(table)
+
+    def _uses_sequence(self, field):
+        return (
+            self.connection.pk_allocator is not None and
+            field.get_internal_type() in self.connection.auto_field_types
+        )
+
+    def create_model(self, model):
+        snowflake_object = getattr(model._meta, 'snowflake_object', None)
+        if snowflake_object is not None:
+            # A dynamic table or materialized view.
+            self.execute(*snowflake_object.create_sql(model._meta.db_table, self, model._meta.apps))
+            return
+        # Create the sequences that back AutoFields before the table that
+        # references them.
+        for field in model._meta.local_fields:
+            if self._uses_sequence(field):
+                self.execute(self.sql_create_sequence % {'sequence': self._sequence_name(model, field)})
+        super().create_model(model)
+
+    def delete_model(self, model):
+        snowflake_object = getattr(model._meta, 'snowflake_object', None)
+        if snowflake_object is not None:
+            self.execute(snowflake_object.delete_sql(model._meta.db_table, self))
+            return
+        super().delete_model(model)
+        for field in model._meta.local_fields:
+            if self._uses_sequence(field):
+                self.execute(self.sql_delete_sequence % {'sequence': self._sequence_name(model, field)})
+        if self.connection.pk_allocator:
+            self.connection.pk_allocator.forget(model._meta.db_table)
+
+    def alter_db_table(self, model, old_db_table, new_db_table):
+        super().alter_db_table(model, old_db_table, new_db_table)
+        if self.connection.pk_allocator:
+            self.connection.pk_allocator.forget(old_db_table)
+            if old_db_table != new_db_table:
+                for field in model._meta.local_fields:
+                    if self._uses_sequence(field):
+                        self._rename_sequence(model, field)
 
     def _create_index_sql(self, model, fields=None, **kwargs):
         # Snowflake doesn't use indexes.
         return ''
 
     def _model_indexes_sql(self, model):
-        return []
+        if not model._meta.managed or model._meta.proxy or model._meta.swapped:
+            return []
+        output = []
+        for field in model._meta.local_fields:
+            output.extend(self._field_indexes_sql(model, field))
+        # Only the Snowflake features declared in Meta.indexes.
+        output.extend(
+            index.create_sql(model, self) for index in model._meta.indexes
+            if isinstance(index, SnowflakeIndex)
+        )
+        return output
+
+    def _field_should_be_indexed(self, model, field):
+        # Foreign keys are indexed by default but are rarely selective enough
+        # to be worth the cost of search optimization.
+        return (
+            self.search_optimization is not None and not field.remote_field and
+            super()._field_should_be_indexed(model, field)
+        )
 
     def _field_indexes_sql(self, model, field):
+        if self._field_should_be_indexed(model, field):
+            return [self._search_optimization_sql(self.sql_add_search_optimization, model, field)]
         return []
 
+    def _search_optimization_sql(self, template, model, field):
+        return template % {
+            'table': self.quote_name(model._meta.db_table),
+            'method': self.search_optimization.upper(),
+            'columns': self.quote_name(field.column),
+        }
+
     def add_index(self, model, index):
-        pass
+        if isinstance(index, SnowflakeIndex):
+            self.execute(index.create_sql(model, self), params=None)
 
     def remove_index(self, model, index):
-        pass
+        if isinstance(index, SnowflakeIndex):
+            self.execute(index.remove_sql(model, self))
 
     def alter_index_together(self, model, old_index_together, new_index_together):
         pass
@@ -46,39 +275,77 @@ class DatabaseSchemaEditor(BaseDatabaseSchemaEditor):
                 'to_table': self.quote_name(to_table),
                 'to_column': self.quote_name(to_column),
             }
-        # Build the SQL and run it
-        sql = self.sql_create_column % {
-            "table": self.quote_name(model._meta.db_table),
-            "column": self.quote_name(field.column),
-            "definition": definition,
-        }
-        self.execute(sql, params)
+        # Add the column along with any other columns added to the same table
+        # by consecutive add_field() calls (e.g. in a migration) so that the
+        # table is rewritten once by the UPDATE of the defaults.
+        if self.pending_fields and self.pending_fields[0][0]._meta.db_table != model._meta.db_table:
+            self.flush_pending_fields()
+        self.pending_fields.append((model, field, definition, params))
+        self.deferred_sql.extend(self._field_indexes_sql(model, field))
+
+    def flush_pending_fields(self):
+        """Add the columns queued by add_field()."""
+        if not self.pending_fields:
+            return
+        pending_fields, self.pending_fields = self.pending_fields, []
+        model = pending_fields[0][0]
+        table = self.quote_name(model._meta.db_table)
+        for _, field, _, _ in pending_fields:
+            if self._uses_sequence(field):
+                self.execute(self.sql_create_sequence % {'sequence': self._sequence_name(model, field)})
+        self.execute(
+            self.sql_create_columns % {
+                'table': table,
+                'columns': ', '.join(
+                    '%s %s' % (self.quote_name(field.column), definition)
+                    for _, field, definition, _ in pending_fields
+                ),
+            },
+            [param for *_, params in pending_fields for param in params],
+        )
         # Set default values on existing rows. Django usually uses database
         # defaults for this, but Snowflake doesn't allow dropping a default
         # value for columns added after the table is created.
-        effective_default = self.effective_default(field)
-        if effective_default is not None:
-            self.execute(
-                "UPDATE %(table)s SET %(column)s=%%s" % {
-                    "table": self.quote_name(model._meta.db_table),
-                    "column": self.quote_name(field.column),
-                },
-                (effective_default,),
-            )
-        # Add NOT NULL to the column, if required, after it's created rather
-        # when it's created, otherwise a database default would be required
-        # which can't be dropped as discussed in the previous comment.
-        if not field.null:
-            db_params = field.db_parameters(connection=self.connection)
+        defaults = [
+            (field, self.effective_default(field)) for _, field, _, _ in pending_fields
+        ]
+        defaults = [(field, default) for field, default in defaults if default is not None]
+        if defaults:
             self.execute(
-                self.sql_alter_column % {
-                    "table": self.quote_name(model._meta.db_table),
-                    "changes": self.sql_alter_column_not_null % {
-                        "column": self.quote_name(field.column),
-                        "type": db_params["type"],
-                    },
+                'UPDATE %(table)s SET %(columns)s' % {
+                    'table': table,
+                    'columns': ', '.join('%s=%%s' % self.quote_name(field.column) for field, _ in defaults),
                 },
+                [default for _, default in defaults],
             )
+        # Add NOT NULL to the columns, if required, after they're created
+        # rather when they're created, otherwise a database default would be
+        # required which can't be dropped as discussed in the previous
+        # comment.
+        not_null_columns = [
+            self.sql_not_null_column % {'column': self.quote_name(field.column)}
+            for _, field, _, _ in pending_fields if not field.null
+        ]
+        if not_null_columns:
+            self.execute(self.sql_alter_columns_not_null % {
+                'table': table, 'columns': ', '.join(not_null_columns),
+            })
+
+    def _constraint_names(self, model, *args, **kwargs):
+        # Introspection requires the pending columns.
+        self.flush_pending_fields()
+        self.flush_statements()
+        # Only introspect the clustering key and search optimization if the
+        # model may have them.
+        introspection = self.connection.introspection
+        include_table_options = introspection.include_table_options
+        introspection.include_table_options = self.search_optimization is not None or any(
+            isinstance(index, SnowflakeIndex) for index in model._meta.indexes
+        )
+        try:
+            return super()._constraint_names(model, *args, **kwargs)
+        finally:
+            introspection.include_table_options = include_table_options
 
     def column_sql(self, model, field, include_default=False, exclude_not_null=False):
         # Get the column's type and use that as the basis of the SQL
@@ -90,6 +357,8 @@ class DatabaseSchemaEditor(BaseDatabaseSchemaEditor):
         collation = getattr(field, 'db_collation', None)
         if collation:
             sql += self._collate_sql(collation)
+        if self._uses_sequence(field):
+            sql += ' DEFAULT %s.NEXTVAL' % self._sequence_name(model, field)
         if not field.null and not exclude_not_null:
             sql += " NOT NULL"
         if field.primary_key:
@@ -104,11 +373,17 @@ class DatabaseSchemaEditor(BaseDatabaseSchemaEditor):
 
     def _alter_field(self, model, old_field, new_field, old_type, new_type,
                      old_db_params, new_db_params, strict=False):
+        old_indexed = self._field_should_be_indexed(model, old_field)
+        new_indexed = self._field_should_be_indexed(model, new_field)
+        if old_indexed and not new_indexed:
+            self.execute(self._search_optimization_sql(self.sql_drop_search_optimization, model, old_field))
         super()._alter_field(
             model, old_field, new_field, old_type, new_type,
             old_db_params, new_db_params, strict,
         )
-        auto_fields = self.connection.data_types_suffix
+        if new_indexed and not old_indexed:
+            self.execute(self._search_optimization_sql(self.sql_add_search_optimization, model, new_field))
+        auto_fields = self.connection.auto_field_types
         old_internal_type = old_field.get_internal_type()
         new_internal_type = new_field.get_internal_type()
         # Altering to an AutoField isn't supported because Snowflake doesn't
@@ -121,7 +396,8 @@ class DatabaseSchemaEditor(BaseDatabaseSchemaEditor):
                     'field_type': new_internal_type,
                 }
             )
-        # If migrating away from AutoField, drop AUTOINCREMENT.
+        # If migrating away from AutoField, drop AUTOINCREMENT (or the
+        # sequence default).
         if old_internal_type in auto_fields and new_internal_type not in auto_fields:
             self.execute(self.sql_alter_column % {
                 "table": self.quote_name(model._meta.db_table),
@@ -129,6 +405,13 @@ class DatabaseSchemaEditor(BaseDatabaseSchemaEditor):
                     "column": self.quote_name(new_field.column),
                 },
             })
+            if self._uses_sequence(old_field):
+                self.execute(self.sql_delete_sequence % {
+                    'sequence': self._sequence_name(model, old_field),
+                })
+                self.connection.pk_allocator.forget(model._meta.db_table)
+        elif self._uses_sequence(old_field) and old_field.column != new_field.column:
+            self._rename_sequence(model, new_field)
 
     def quote_value(self, value):
         # A more complete implementation isn't currently required.
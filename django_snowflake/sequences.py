@@ -0,0 +1,62 @@
+import re
+from collections import deque
+
+from django.utils.regex_helper import _lazy_re_compile
+
+nextval_re = _lazy_re_compile(r'^(.+)\.NEXTVAL$', re.IGNORECASE)
+
+
+class PrimaryKeyAllocator:
+    """
+    Reserve blocks of primary key values from the sequences that back
+    AutoFields (see DatabaseSchemaEditor.column_sql()) so that primary keys
+    can be assigned before an INSERT rather than retrieved afterward by
+    DatabaseOperations.last_insert_id().
+    """
+    def __init__(self, connection, block_size):
+        self.connection = connection
+        self.block_size = block_size
+        # {table_name: sequence name or None if the column isn't backed by
+        # a sequence (e.g. the table was created with AUTOINCREMENT)}
+        self.sequences = {}
+        # {sequence name: deque of reserved values}
+        self.blocks = {}
+
+    def get_sequence(self, cursor, table_name, column):
+        if table_name not in self.sequences:
+            sequence = None
+            for field_info in self.connection.introspection.get_table_description(cursor, table_name):
+                if field_info.name == self.connection.introspection.identifier_converter(column):
+                    m = nextval_re.search(field_info.default or '')
+                    sequence = m[1] if m else None
+                    break
+            self.sequences[table_name] = sequence
+        return self.sequences[table_name]
+
+    def allocate(self, cursor, table_name, column, count):
+        """
+        Return a list of `count` primary key values for the given column or
+        None if the column isn't backed by a sequence.
+        """
+        sequence = self.get_sequence(cursor, table_name, column)
+        if sequence is None:
+            return None
+        values = self.blocks.setdefault(sequence, deque())
+        if len(values) < count:
+            # A single NEXTVAL over a generator reserves the whole block.
+            cursor.execute(
+                'SELECT %s.NEXTVAL FROM TABLE(GENERATOR(ROWCOUNT => %d))' % (
+                    sequence, max(count - len(values), self.block_size),
+                )
+            )
+            values.extend(sorted(row[0] for row in cursor.fetchall()))
+        return [values.popleft() for _ in range(count)]
+
+    def forget(self, table_name):
+        """Forget the sequence of a table that's been altered or deleted."""
+        self.sequences.pop(table_name, None)
+
+    def reset(self):
+        """Forget everything, e.g. after the sequences are replaced."""
+        self.sequences.clear()
+        self.blocks.clear()
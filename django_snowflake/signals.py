@@ -0,0 +1,11 @@
+from django.dispatch import Signal
+
+# Sent after each statement is executed (see TelemetryCursor) with the
+# arguments: connection, sql, params, many, query_id, duration (in seconds),
+# rowcount, origin (the view or management command that executed it), and
+# exception (or None).
+query_executed = Signal()
+
+# Sent by fetch_query_stats() for each query with the arguments: connection,
+# query_id, and stats (a dict of QUERY_HISTORY columns).
+query_stats_fetched = Signal()
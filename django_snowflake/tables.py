@@ -0,0 +1,103 @@
+from django.db.models import options
+from django.utils.deconstruct import deconstructible
+
+
+def register_options():
+    """
+    Allow Meta.snowflake_object, which makes a model's table a dynamic
+    table or a materialized view. Options are validated when models are
+    defined, so this runs when django_snowflake is imported (by adding it to
+    INSTALLED_APPS).
+    """
+    if 'snowflake_object' not in options.DEFAULT_NAMES:
+        options.DEFAULT_NAMES += ('snowflake_object',)
+
+
+class SnowflakeObject:
+    """
+    A table defined by a query. `query` is SQL or a function that takes an
+    app registry (as in RunPython, the historical models in migrations) and
+    returns a QuerySet.
+    """
+    def __init__(self, query):
+        self.query = query
+
+    def __eq__(self, other):
+        return self.__class__ == other.__class__ and self.deconstruct() == other.deconstruct()
+
+    def get_query(self, schema_editor, apps):
+        """Return the (sql, params) of the query."""
+        if isinstance(self.query, str):
+            return self.query, ()
+        queryset = self.query(apps)
+        return queryset.query.get_compiler(schema_editor.connection.alias).as_sql()
+
+    def get_sql_kwargs(self, schema_editor):
+        return {}
+
+    def create_sql(self, table, schema_editor, apps):
+        sql, params = self.get_query(schema_editor, apps)
+        kwargs = {'table': schema_editor.quote_name(table), **self.get_sql_kwargs(schema_editor)}
+        if params:
+            # The query's parameters are interpolated with the rest of the
+            # statement.
+            kwargs = {key: value.replace('%', '%%') for key, value in kwargs.items()}
+        else:
+            params = None
+        return self.sql_create % {**kwargs, 'query': sql}, params
+
+    @classmethod
+    def delete_sql(cls, table, schema_editor):
+        return cls.sql_delete % {'table': schema_editor.quote_name(table)}
+
+
+@deconstructible(path='django_snowflake.tables.DynamicTable')
+class DynamicTable(SnowflakeObject):
+    """
+    A dynamic table that Snowflake refreshes so that it's at most target_lag
+    (e.g. '1 hour' or 'DOWNSTREAM') behind the tables that it queries, using
+    the given warehouse.
+    """
+    sql_create = (
+        'CREATE DYNAMIC TABLE %(table)s TARGET_LAG = %(target_lag)s WAREHOUSE = %(warehouse)s '
+        'AS %(query)s'
+    )
+    sql_alter = 'ALTER DYNAMIC TABLE %(table)s SET %(changes)s'
+    sql_delete = 'DROP DYNAMIC TABLE %(table)s'
+
+    def __init__(self, query, *, target_lag, warehouse):
+        super().__init__(query)
+        self.target_lag = target_lag
+        self.warehouse = warehouse
+
+    @staticmethod
+    def target_lag_sql(target_lag):
+        if target_lag.upper() == 'DOWNSTREAM':
+            return 'DOWNSTREAM'
+        return "'%s'" % target_lag.replace("'", "\\'")
+
+    def get_sql_kwargs(self, schema_editor):
+        return {
+            'target_lag': self.target_lag_sql(self.target_lag),
+            'warehouse': schema_editor.quote_name(self.warehouse),
+        }
+
+    @classmethod
+    def alter_sql(cls, table, schema_editor, target_lag=None, warehouse=None):
+        changes = []
+        if target_lag is not None:
+            changes.append('TARGET_LAG = %s' % cls.target_lag_sql(target_lag))
+        if warehouse is not None:
+            changes.append('WAREHOUSE = %s' % schema_editor.quote_name(warehouse))
+        return cls.sql_alter % {'table': schema_editor.quote_name(table), 'changes': ' '.join(changes)}
+
+
+@deconstructible(path='django_snowflake.tables.MaterializedView')
+class MaterializedView(SnowflakeObject):
+    """
+    A materialized view, which Snowflake keeps up to date in the background.
+    The query may only select from one table and can't use joins (see
+    Snowflake's documentation for other limitations).
+    """
+    sql_create = 'CREATE MATERIALIZED VIEW %(table)s AS %(query)s'
+    sql_delete = 'DROP MATERIALIZED VIEW %(table)s'
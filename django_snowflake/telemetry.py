@@ -0,0 +1,112 @@
+import json
+import os
+import sys
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from .signals import query_stats_fetched
+
+# The view or management command that's executing queries.
+current_origin = ContextVar('current_origin', default=None)
+# A dict that's set as the QUERY_TAG (in JSON) of the queries executed in a
+# request.
+current_query_tag = ContextVar('current_query_tag', default=None)
+
+# QUERY_HISTORY columns returned by fetch_query_stats(), if available.
+query_stats_columns = (
+    'QUERY_ID', 'QUERY_TAG', 'WAREHOUSE_NAME', 'EXECUTION_STATUS', 'TOTAL_ELAPSED_TIME',
+    'QUEUED_PROVISIONING_TIME', 'QUEUED_REPAIR_TIME', 'QUEUED_OVERLOAD_TIME',
+    'COMPILATION_TIME', 'EXECUTION_TIME', 'BYTES_SCANNED', 'ROWS_PRODUCED',
+    'PARTITIONS_SCANNED', 'PARTITIONS_TOTAL',
+)
+
+
+def get_origin():
+    """
+    Return the view or management command that's executing queries, if
+    known.
+    """
+    origin = current_origin.get()
+    if origin is None and sys.argv and os.path.basename(sys.argv[0]) in ('manage.py', 'django-admin'):
+        origin = 'command:%s' % (sys.argv[1] if len(sys.argv) > 1 else '')
+    return origin
+
+
+@contextmanager
+def query_origin(origin, **tag):
+    """
+    Attribute the queries executed in the block to `origin` and add the
+    keyword arguments to their QUERY_TAG (if the connection's
+    'REQUEST_QUERY_TAG' setting is enabled).
+    """
+    origin_token = current_origin.set(origin)
+    tag_token = current_query_tag.set({'origin': origin, **tag})
+    try:
+        yield
+    finally:
+        current_query_tag.reset(tag_token)
+        current_origin.reset(origin_token)
+
+
+def get_query_tag():
+    tag = current_query_tag.get()
+    return None if tag is None else json.dumps(tag, default=str, sort_keys=True)
+
+
+class QueryOriginMiddleware:
+    """
+    Attribute the queries executed by a view to the view's name. Add to
+    MIDDLEWARE after any middleware that executes queries that should be
+    attributed to the request rather than to the view.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with query_origin('request:%s' % request.path, method=request.method):
+            return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        match = request.resolver_match
+        view_name = match.view_name if match else '%s.%s' % (view_func.__module__, view_func.__qualname__)
+        current_origin.set('view:%s' % view_name)
+        current_query_tag.set({**current_query_tag.get(), 'origin': 'view:%s' % view_name})
+
+
+def fetch_query_stats(connection, query_ids, account_usage=False):
+    """
+    Return a dict mapping each of the given query IDs to a dict of execution
+    statistics from QUERY_HISTORY (queued time, compilation time, bytes and
+    partitions scanned, etc.) and send the query_stats_fetched signal for
+    each. Queries are found in the INFORMATION_SCHEMA.QUERY_HISTORY table
+    function (recent queries that aren't reported until they finish), or in
+    SNOWFLAKE.ACCOUNT_USAGE.QUERY_HISTORY if account_usage=True (which has
+    more columns, such as PARTITIONS_SCANNED, but is delayed by up to 45
+    minutes).
+    """
+    query_ids = list(query_ids)
+    if not query_ids:
+        return {}
+    if account_usage:
+        source = 'SNOWFLAKE.ACCOUNT_USAGE.QUERY_HISTORY'
+    else:
+        source = 'TABLE(INFORMATION_SCHEMA.QUERY_HISTORY(RESULT_LIMIT => 10000))'
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT * FROM %s WHERE QUERY_ID IN (%s)' % (source, ', '.join(['%s'] * len(query_ids))),
+            query_ids,
+        )
+        columns = [column[0].upper() for column in cursor.description]
+        rows = cursor.fetchall()
+    stats = {}
+    for row in rows:
+        values = dict(zip(columns, row))
+        query_stats = {
+            column.lower(): values[column] for column in query_stats_columns if column in values
+        }
+        stats[values['QUERY_ID']] = query_stats
+        query_stats_fetched.send(
+            sender=connection.__class__, connection=connection,
+            query_id=values['QUERY_ID'], stats=query_stats,
+        )
+    return stats
@@ -0,0 +1,55 @@
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .explain import parse_plan
+
+
+class QueryPlanAssertionsMixin:
+    """
+    Assertions about query plans for TestCase classes, e.g. to fail when a
+    change to a QuerySet's filters prevents partition pruning.
+    """
+    def get_plan(self, queryset_or_sql, params=(), using=None):
+        if isinstance(queryset_or_sql, str):
+            connection = connections[using or DEFAULT_DB_ALIAS]
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN USING JSON ' + queryset_or_sql, params)
+                return parse_plan('\n'.join(row[0] for row in cursor.fetchall()))
+        return parse_plan(queryset_or_sql.explain(format='JSON'))
+
+    def assertPartitionsPruned(self, queryset_or_sql, max_percent=None, max_partitions=None,
+                               table=None, params=(), using=None, msg=None):
+        """
+        Assert that the query scans at most `max_percent` percent or
+        `max_partitions` partitions (of `table`, if given, otherwise of all
+        tables). Accept a QuerySet or SQL.
+        """
+        plan = self.get_plan(queryset_or_sql, params, using)
+        if table is None:
+            assigned, total = plan.partitions_assigned, plan.partitions_total
+            if assigned is None or total is None:
+                self.fail(self._formatMessage(msg, "The query plan doesn't have partition statistics."))
+        else:
+            scans = plan.scans_of(table)
+            if not scans:
+                self.fail(self._formatMessage(msg, 'The query plan has no scan of %s.' % table))
+            assigned = sum(scan.partitions_assigned or 0 for scan in scans)
+            total = sum(scan.partitions_total or 0 for scan in scans)
+        if max_partitions is not None and assigned > max_partitions:
+            self.fail(self._formatMessage(
+                msg, 'The query scans %d of %d partitions (more than %d).' % (assigned, total, max_partitions),
+            ))
+        if max_percent is not None and total and assigned * 100 / total > max_percent:
+            self.fail(self._formatMessage(
+                msg, 'The query scans %d of %d partitions (%.1f%%, more than %s%%).' % (
+                    assigned, total, assigned * 100 / total, max_percent,
+                ),
+            ))
+
+    def assertNoFullTableScan(self, queryset_or_sql, params=(), using=None, msg=None):
+        """Assert that each table scanned by the query is pruned."""
+        plan = self.get_plan(queryset_or_sql, params, using)
+        full_scans = plan.full_table_scans
+        if full_scans:
+            self.fail(self._formatMessage(msg, 'The query scans all partitions of %s.' % ', '.join(
+                name for scan in full_scans for name in scan.objects
+            )))
@@ -0,0 +1,58 @@
+import math
+
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+from django.db.utils import DatabaseErrorWrapper as BaseDatabaseErrorWrapper
+
+# The error code of a statement canceled after STATEMENT_TIMEOUT_IN_SECONDS or
+# STATEMENT_QUEUED_TIMEOUT_IN_SECONDS.
+STATEMENT_TIMEOUT_ERRNO = 630
+
+
+class QueryTimeout(OperationalError):
+    """
+    A query was canceled because it ran (or was queued) for longer than its
+    timeout. `query_id` is its Snowflake query ID, if known.
+    """
+    def __init__(self, *args, query_id=None):
+        super().__init__(*args)
+        self.query_id = query_id
+
+
+def is_statement_timeout(exc):
+    """
+    Return True if the connector exception is from a statement that Snowflake
+    canceled because of a timeout.
+    """
+    return getattr(exc, 'errno', None) == STATEMENT_TIMEOUT_ERRNO
+
+
+class DatabaseErrorWrapper(BaseDatabaseErrorWrapper):
+    """Like Django's DatabaseErrorWrapper but raise QueryTimeout for timeouts."""
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None and is_statement_timeout(exc_value):
+            self.wrapper.errors_occurred = True
+            raise QueryTimeout(*exc_value.args, query_id=getattr(exc_value, 'sfqid', None)).with_traceback(
+                traceback
+            ) from exc_value
+        return super().__exit__(exc_type, exc_value, traceback)
+
+
+def statement_timeout(seconds, using=DEFAULT_DB_ALIAS):
+    """
+    Return a context manager that makes Snowflake cancel the block's
+    statements that run for longer than `seconds`, raising QueryTimeout.
+    """
+    return connections[using].execution_options(**timeout_options(seconds))
+
+
+def timeout_options(seconds):
+    """
+    Return the execution_options() for a statement timeout. Since
+    STATEMENT_TIMEOUT_IN_SECONDS is a whole number of seconds (and 0 disables
+    it), a fractional timeout is rounded up so that it's the same for
+    SnowflakeQuerySet.fetch_async().
+    """
+    if seconds <= 0:
+        raise ValueError('The statement timeout must be positive.')
+    seconds = math.ceil(seconds)
+    return {'timeout': seconds, 'session_parameters': {'STATEMENT_TIMEOUT_IN_SECONDS': seconds}}
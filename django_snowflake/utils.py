@@ -1,3 +1,5 @@
+import time
+
 import django
 from django.core.exceptions import ImproperlyConfigured
 from django.utils.version import get_version_tuple
@@ -19,3 +21,26 @@ def check_django_compatability():
                 C=__version__,
             )
         )
+
+
+def wait_for_queries(connection, query_ids, timeout=None, poll_interval=0.5, progress=None):
+    """
+    Wait for asynchronous queries (see SnowflakeCursor.execute_async()) of a
+    connector connection to finish, raising an exception if one fails.
+    Return the IDs of the queries that are still running after `timeout`
+    seconds. If given, call progress(finished, total) when queries finish.
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    running = list(query_ids)
+    while running:
+        still_running = [
+            query_id for query_id in running
+            if connection.is_still_running(connection.get_query_status_throw_if_error(query_id))
+        ]
+        if progress is not None and len(still_running) < len(running):
+            progress(len(query_ids) - len(still_running), len(query_ids))
+        running = still_running
+        if not running or (deadline is not None and time.monotonic() >= deadline):
+            break
+        time.sleep(poll_interval)
+    return running
@@ -0,0 +1,119 @@
+from contextlib import contextmanager
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .timeouts import is_statement_timeout
+
+
+class Warehouse:
+    """
+    A warehouse of the 'WAREHOUSES' setting.
+
+    - name: The warehouse's name in Snowflake.
+    - fallback: The name (in 'WAREHOUSES') of the warehouse on which a query
+      is retried if it's canceled because it was queued for too long.
+    - queued_timeout: The STATEMENT_QUEUED_TIMEOUT_IN_SECONDS session
+      parameter while the warehouse is selected.
+    """
+    def __init__(self, alias, name, fallback=None, queued_timeout=None):
+        self.alias = alias
+        self.name = name
+        self.fallback = fallback
+        self.queued_timeout = queued_timeout
+
+    def __repr__(self):
+        return '<%s %s: %s>' % (self.__class__.__name__, self.alias, self.name)
+
+
+def get_warehouses(settings_dict):
+    """
+    Return {name: Warehouse} for the 'WAREHOUSES' setting, a dict of names
+    mapped to a warehouse name or to a dict with 'NAME', 'FALLBACK', and
+    'QUEUED_TIMEOUT' keys.
+    """
+    warehouses = {}
+    for alias, options in settings_dict.get('WAREHOUSES', {}).items():
+        if isinstance(options, str):
+            options = {'NAME': options}
+        if not options.get('NAME'):
+            raise ImproperlyConfigured("The 'WAREHOUSES' setting's %r is missing 'NAME'." % alias)
+        warehouses[alias] = Warehouse(
+            alias, options['NAME'], options.get('FALLBACK'), options.get('QUEUED_TIMEOUT'),
+        )
+    for warehouse in warehouses.values():
+        if warehouse.fallback is not None and warehouse.fallback not in warehouses:
+            raise ImproperlyConfigured(
+                "The 'WAREHOUSES' setting's %r has an unknown 'FALLBACK': %r." % (
+                    warehouse.alias, warehouse.fallback,
+                )
+            )
+    return warehouses
+
+
+def is_queued_timeout(exc):
+    """
+    Return True if the exception is from a statement that was canceled
+    because it was queued for longer than STATEMENT_QUEUED_TIMEOUT_IN_SECONDS.
+    """
+    return is_statement_timeout(exc) and 'queued' in str(exc).lower()
+
+
+def snowflake_warehouse(name, using=DEFAULT_DB_ALIAS):
+    """
+    Return a context manager that runs the queries of the block on the
+    warehouse with the given name in the 'WAREHOUSES' setting.
+    """
+    connection = connections[using]
+    return connection.execution_options(**connection.warehouse_options(name))
+
+
+def normalize_size(size):
+    """
+    Return a warehouse size in the form of WAREHOUSE_SIZE's values (e.g.
+    'XSMALL' or 'X4LARGE') since sizes have several spellings, e.g. SHOW
+    WAREHOUSES returns 'X-Small' and '4X-Large'.
+    """
+    size = size.upper().replace('-', '').replace('_', '')
+    if size[:1].isdigit():
+        # '4XLARGE' -> 'X4LARGE'
+        size = 'X' + size.replace('X', '', 1)
+    elif size in ('XXLARGE', 'XXXLARGE'):
+        size = 'X%dLARGE' % size.count('X')
+    return size
+
+
+@contextmanager
+def warehouse_size(size, warehouse=None, using=DEFAULT_DB_ALIAS):
+    """
+    Resize a warehouse (by default, the one selected for the block's queries)
+    to `size` (e.g. 'XLARGE') for the duration of the block and then restore
+    its size. The resize waits for the new size's servers to be provisioned.
+    Other sessions using the warehouse are also affected.
+    """
+    connection = connections[using]
+    if warehouse is None:
+        name = connection.selected_warehouse.name
+    else:
+        name = connection.get_warehouse(warehouse).name
+    quoted_name = connection.ops.quote_name(name)
+    # SHOW WAREHOUSES returns the identifier (e.g. upper-cased) that's
+    # referenced by the quoted name.
+    identifier = quoted_name[1:-1]
+    with connection.cursor() as cursor:
+        cursor.execute('SHOW WAREHOUSES LIKE %s', [identifier])
+        old_size = next((row[3] for row in cursor.fetchall() if row[0] == identifier), None)
+        if old_size is None:
+            raise ValueError('Warehouse %r does not exist or is not visible to the role.' % name)
+        old_size, size = normalize_size(old_size), normalize_size(size)
+        if old_size != size:
+            cursor.execute(
+                'ALTER WAREHOUSE %s SET WAREHOUSE_SIZE = %%s WAIT_FOR_COMPLETION = TRUE' % quoted_name,
+                [size],
+            )
+    try:
+        yield
+    finally:
+        if old_size != size:
+            with connection.cursor() as cursor:
+                cursor.execute('ALTER WAREHOUSE %s SET WAREHOUSE_SIZE = %%s' % quoted_name, [old_size])
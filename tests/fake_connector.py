@@ -0,0 +1,137 @@
+import gzip
+import itertools
+import re
+
+from snowflake.connector.errors import ProgrammingError
+
+# {query: rows} returned for the queries of every FakeConnection.
+DEFAULT_RESULTS = {
+    'SELECT current_version()': [('8.0.0',)],
+}
+
+
+class FakeCursor:
+    """A connector cursor that records the statements it executes."""
+    def __init__(self, connection):
+        self.connection = connection
+        self.description = None
+        self.rowcount = -1
+        self.sfqid = None
+        self.rows = []
+
+    def execute(self, sql, params=None, **kwargs):
+        self.record(sql, params)
+        error = self.connection.error_for(sql)
+        if error:
+            raise ProgrammingError(msg=error, errno=1003, sfqid=self.sfqid)
+        match = re.match(r"PUT 'file://(.+?)' ", sql)
+        if match:
+            # Read the file now since it's removed after it's uploaded.
+            with gzip.open(match[1], 'rt', encoding='utf-8', newline='') as f:
+                self.connection.uploaded_files.append(f.read())
+        self.rows = list(self.connection.results.get(sql, []))
+        self.rowcount = len(self.rows)
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        for params in seq_of_params:
+            self.execute(sql, params)
+        return self
+
+    def execute_async(self, sql, params=None):
+        self.record(sql, params)
+        self.connection.async_queries[self.sfqid] = sql
+        return {'queryId': self.sfqid}
+
+    def record(self, sql, params):
+        self.connection.statements.append(sql)
+        self.connection.params.append(params)
+        self.sfqid = self.connection.next_query_id()
+
+    def get_results_from_sfqid(self, sfqid):
+        self.rows = list(self.connection.results.get(self.connection.async_queries[sfqid], []))
+        self.rowcount = len(self.rows)
+
+    def fetchone(self):
+        return self.rows.pop(0) if self.rows else None
+
+    def fetchmany(self, size=1):
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        return rows
+
+    def fetchall(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class FakeConnection:
+    """
+    A connector connection that doesn't connect to Snowflake.
+
+    - statements and params: The executed statements and their parameters.
+    - results: {statement: rows} returned by the statements.
+    - uploaded_files: The (decompressed) contents of the files uploaded with
+      PUT.
+    - polls: The number of status checks before an async query finishes
+      (None for a query that never finishes).
+    - errors: {statement prefix: message} of the statements that fail (async
+      queries fail when their status is checked).
+    """
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.statements = []
+        self.params = []
+        self.results = dict(DEFAULT_RESULTS)
+        self.uploaded_files = []
+        self.polls = 0
+        self.errors = {}
+        self.async_queries = {}
+        self.status_checks = {}
+        self.transactions = []
+        self.query_ids = itertools.count(1)
+        self.closed = False
+
+    def next_query_id(self):
+        return 'query-%d' % next(self.query_ids)
+
+    def error_for(self, sql):
+        return next((message for prefix, message in self.errors.items() if sql.startswith(prefix)), None)
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def autocommit(self, mode):
+        self.transactions.append('AUTOCOMMIT %s' % mode)
+
+    def commit(self):
+        self.transactions.append('COMMIT')
+
+    def rollback(self):
+        self.transactions.append('ROLLBACK')
+
+    def get_query_status_throw_if_error(self, sfqid):
+        error = self.error_for(self.async_queries[sfqid])
+        if error:
+            raise ProgrammingError(msg=error, errno=1003, sfqid=sfqid)
+        self.status_checks[sfqid] = self.status_checks.get(sfqid, 0) + 1
+        if self.polls is None or self.status_checks[sfqid] <= self.polls:
+            return 'RUNNING'
+        return 'SUCCESS'
+
+    def is_still_running(self, status):
+        return status == 'RUNNING'
+
+    def is_closed(self):
+        return self.closed
+
+    def close(self):
+        self.closed = True
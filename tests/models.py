@@ -0,0 +1,7 @@
+from django.db import models
+
+
+class Item(models.Model):
+    name = models.CharField(max_length=20, unique=True)
+    data = models.BinaryField(null=True)
+    flag = models.BooleanField(default=False)
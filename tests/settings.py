@@ -0,0 +1,19 @@
+# Settings for the tests that run against tests.fake_connector rather than
+# Snowflake: python -m django test --settings=tests.settings
+DATABASES = {
+    'default': {
+        'ENGINE': 'django_snowflake',
+        'NAME': 'DJANGO_TESTS',
+        'SCHEMA': 'PUBLIC',
+        'WAREHOUSE': 'COMPUTE_WH',
+        'USER': 'user',
+        'PASSWORD': 'password',
+        'ACCOUNT': 'account',
+        'BULK_INSERT_STAGE_THRESHOLD': 2,
+        'WAREHOUSES': {'reporting': 'reporting_wh'},
+    },
+}
+DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
+INSTALLED_APPS = ['tests']
+SECRET_KEY = 'django_tests_secret_key'
+USE_TZ = True
@@ -0,0 +1,119 @@
+import asyncio
+from unittest import IsolatedAsyncioTestCase, mock
+
+from django.db import NotSupportedError, ProgrammingError, connection
+
+from django_snowflake.async_queries import AsyncConnection, async_connections
+from django_snowflake.queryset import SnowflakeQuerySet
+from django_snowflake.timeouts import QueryTimeout
+
+from .fake_connector import FakeConnection
+from .models import Item
+
+CANCEL_QUERY = 'SELECT SYSTEM$CANCEL_QUERY(%s)'
+
+
+class AsyncConnectionTests(IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.fake = FakeConnection()
+        self.connection = AsyncConnection(connection=self.fake, poll_interval=0.01, min_poll_interval=0.001)
+
+    async def test_execute_polls_until_finished(self):
+        self.fake.polls = 3
+        self.fake.results['SELECT 1'] = [(1,)]
+        self.assertEqual(await self.connection.execute('SELECT 1'), [(1,)])
+        self.assertEqual(self.fake.statements, ['SELECT 1'])
+        self.assertEqual(self.fake.status_checks, {'query-1': 4})
+
+    async def test_timeout_cancels_query(self):
+        self.fake.polls = None
+        with self.assertRaisesRegex(QueryTimeout, r'^Query query-1 timed out after 0\.05 seconds') as cm:
+            await self.connection.execute('SELECT 1', timeout=0.05)
+        self.assertEqual(cm.exception.query_id, 'query-1')
+        self.assertEqual(self.fake.statements, ['SELECT 1', CANCEL_QUERY])
+        self.assertEqual(self.fake.params[-1], ['query-1'])
+
+    async def test_cancelled_task_cancels_query(self):
+        self.fake.polls = None
+        task = asyncio.ensure_future(self.connection.execute('SELECT 1'))
+        while not self.fake.status_checks:
+            await asyncio.sleep(0.001)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertEqual(self.fake.statements, ['SELECT 1', CANCEL_QUERY])
+        self.assertEqual(self.fake.params[-1], ['query-1'])
+
+    async def test_failed_query(self):
+        self.fake.errors['SELECT 1'] = 'SQL compilation error.'
+        with self.assertRaisesRegex(ProgrammingError, 'SQL compilation error'):
+            await self.connection.execute('SELECT 1')
+        # A failed query isn't canceled.
+        self.assertEqual(self.fake.statements, ['SELECT 1'])
+
+
+class FetchAsyncTests(IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.fake = FakeConnection()
+        async_connections['default'] = AsyncConnection(connection=self.fake, min_poll_interval=0.001)
+        self.addCleanup(async_connections.pop, 'default')
+
+    async def test_fetch_async(self):
+        qs = SnowflakeQuerySet(Item).filter(flag=True)
+        sql, params = qs.query.get_compiler(connection=connection).as_sql()
+        self.fake.results[sql] = [(1, 'a', None, True)]
+        items = await qs.fetch_async()
+        self.assertEqual([(item.pk, item.name, item.flag) for item in items], [(1, 'a', True)])
+        self.assertEqual(self.fake.statements, [sql])
+        self.assertEqual(self.fake.params, [params])
+
+    async def test_fetch_async_distinct(self):
+        # Columns added to the SELECT for ordering are trimmed from the rows.
+        qs = SnowflakeQuerySet(Item).values_list('name').order_by('-flag').distinct()
+        sql, params = qs.query.get_compiler(connection=connection).as_sql()
+        self.fake.results[sql] = [('a', True), ('b', False)]
+        self.assertEqual(await qs.fetch_async(), [('a',), ('b',)])
+
+    async def test_session_parameters_not_supported(self):
+        qs = SnowflakeQuerySet(Item).execution_options(session_parameters={'QUERY_TAG': 'report'})
+        with self.assertRaisesRegex(NotSupportedError, r'^fetch_async\(\) does not support session parameters\.$'):
+            await qs.fetch_async()
+        self.assertEqual(self.fake.statements, [])
+
+
+class ReconnectTests(IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.fakes = []
+
+        def connect(**kwargs):
+            self.fakes.append(FakeConnection(**kwargs))
+            return self.fakes[-1]
+        patcher = mock.patch('snowflake.connector.connect', side_effect=connect)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.connection = AsyncConnection(connection, min_poll_interval=0.001)
+
+    async def asyncTearDown(self):
+        await self.connection.close()
+
+    async def test_broken_session_replaced(self):
+        broken = await self.connection.ensure_connection()
+        # The session expires.
+        broken.errors['SELECT'] = 'Session no longer exists.'
+        with self.assertRaises(ProgrammingError):
+            await self.connection.execute('SELECT 1')
+        await self.connection.execute('SELECT 2')
+        self.assertEqual(len(self.fakes), 2)
+        self.assertIs(broken.closed, True)
+        self.assertEqual(self.fakes[1].statements, ['SELECT 2'])
+
+    async def test_usable_session_kept(self):
+        fake = await self.connection.ensure_connection()
+        fake.errors['SELECT "MISSING"'] = 'SQL compilation error.'
+        with self.assertRaises(ProgrammingError):
+            await self.connection.execute('SELECT "MISSING"')
+        await self.connection.execute('SELECT 2')
+        self.assertEqual(len(self.fakes), 1)
+        self.assertIs(self.connection.errors_occurred, False)
+        # The session is checked before it's reused.
+        self.assertEqual(fake.statements, ['SELECT "MISSING"', 'SELECT 1', 'SELECT 2'])
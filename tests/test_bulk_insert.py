@@ -0,0 +1,112 @@
+import os
+import re
+from unittest import TestCase, mock
+
+from django.db import ProgrammingError, connection, transaction
+
+from django_snowflake.queryset import SnowflakeQuerySet
+
+from .fake_connector import FakeConnection
+from .models import Item
+
+
+class BulkInsertTestCase(TestCase):
+    """Tests of bulk_create() with 'BULK_INSERT_STAGE_THRESHOLD' (2 in tests.settings)."""
+    def setUp(self):
+        connection.close()
+        patcher = mock.patch('snowflake.connector.connect', side_effect=FakeConnection)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(connection.close)
+        connection.ensure_connection()
+        self.fake = connection.connection
+        self.fake.statements.clear()
+
+    def staged_path(self, statement):
+        return re.match(r"PUT 'file://(.+?)' ", statement)[1]
+
+
+class StagedBulkInsertTests(BulkInsertTestCase):
+    def test_below_threshold(self):
+        Item.objects.bulk_create([Item(name='a')])
+        self.assertEqual(len(self.fake.statements), 1)
+        self.assertTrue(self.fake.statements[0].startswith('INSERT INTO "TESTS_ITEM"'))
+        self.assertEqual(self.fake.uploaded_files, [])
+
+    def test_staged_insert(self):
+        with transaction.atomic():
+            Item.objects.bulk_create([
+                Item(name='a', data=b'\x01\xff', flag=True),
+                Item(name='b "quoted"'),
+                Item(name=''),
+            ])
+        put, copy = self.fake.statements
+        self.assertRegex(put, r"^PUT 'file://.+' @%\"TESTS_ITEM\" AUTO_COMPRESS=FALSE SOURCE_COMPRESSION=GZIP$")
+        staged_file = '@%%"TESTS_ITEM"/%s' % os.path.basename(self.staged_path(put))
+        self.assertEqual(
+            copy,
+            'COPY INTO "TESTS_ITEM" ("NAME", "DATA", "FLAG") FROM %s FILE_FORMAT=(%s) PURGE=TRUE' % (
+                staged_file, connection.ops.stage_file_format,
+            ),
+        )
+        # Empty strings are quoted to distinguish them from NULL.
+        self.assertEqual(self.fake.uploaded_files, [
+            '"a","01ff","TRUE"\n'
+            '"b ""quoted""",,"FALSE"\n'
+            '"",,"FALSE"\n'
+        ])
+        # The local file is removed.
+        self.assertIs(os.path.exists(self.staged_path(put)), False)
+        # No DDL commits the transaction.
+        self.assertEqual(self.fake.transactions, ['AUTOCOMMIT False', 'COMMIT', 'AUTOCOMMIT True'])
+
+    def test_local_file_removed_if_upload_fails(self):
+        self.fake.errors['PUT '] = 'Stage does not exist.'
+        with self.assertRaises(ProgrammingError):
+            Item.objects.bulk_create([Item(name='a'), Item(name='b')])
+        put, = self.fake.statements
+        self.assertIs(os.path.exists(self.staged_path(put)), False)
+
+
+class StagedMergeTests(BulkInsertTestCase):
+    create_file_format = 'CREATE TEMPORARY FILE FORMAT IF NOT EXISTS DJANGO_STAGE_FILE_FORMAT %s' % (
+        connection.ops.stage_file_format,
+    )
+
+    def test_connect_runs_no_queries(self):
+        connection.close()
+        connection.ensure_connection()
+        self.assertEqual(connection.connection.statements, [])
+
+    def test_staged_merge(self):
+        items = [Item(name='a'), Item(name='b')]
+        SnowflakeQuerySet(Item).bulk_create(items, ignore_conflicts=True)
+        create, put, merge, remove = self.fake.statements
+        self.assertEqual(create, self.create_file_format)
+        staged_file = '@%%"TESTS_ITEM"/%s' % os.path.basename(self.staged_path(put))
+        self.assertTrue(merge.startswith(
+            'MERGE INTO "TESTS_ITEM" USING (SELECT CAST($1 AS VARCHAR(20)) AS "NAME", '
+            'TO_BINARY($2, \'HEX\') AS "DATA", CAST($3 AS BOOLEAN) AS "FLAG" '
+            'FROM %s (FILE_FORMAT => \'DJANGO_STAGE_FILE_FORMAT\')) AS "DJANGO_SOURCE" ' % staged_file
+        ))
+        self.assertEqual(remove, 'REMOVE %s' % staged_file)
+        # The file format is created once per session.
+        self.fake.statements.clear()
+        SnowflakeQuerySet(Item).bulk_create(items, ignore_conflicts=True)
+        self.assertEqual([statement.split()[0] for statement in self.fake.statements], ['PUT', 'MERGE', 'REMOVE'])
+
+    def test_merge_values_in_transaction(self):
+        # The file format can't be created without committing the transaction.
+        with transaction.atomic():
+            SnowflakeQuerySet(Item).bulk_create([Item(name='a'), Item(name='b')], ignore_conflicts=True)
+        merge, = self.fake.statements
+        self.assertTrue(merge.startswith('MERGE INTO "TESTS_ITEM" USING (SELECT COLUMN1 AS "NAME"'))
+        self.assertEqual(self.fake.uploaded_files, [])
+
+    def test_file_format_recreated_after_snapshot_restore(self):
+        SnowflakeQuerySet(Item).bulk_create([Item(name='a'), Item(name='b')], ignore_conflicts=True)
+        with mock.patch.dict(connection.settings_dict, {'SCHEMA': 'PUBLIC'}):
+            connection.creation.restore_snapshot()
+        self.fake.statements.clear()
+        SnowflakeQuerySet(Item).bulk_create([Item(name='a'), Item(name='b')], ignore_conflicts=True)
+        self.assertEqual(self.fake.statements[0], self.create_file_format)
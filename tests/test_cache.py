@@ -0,0 +1,69 @@
+from unittest import TestCase, mock
+
+from django.db import connection, transaction
+
+from django_snowflake.cache import ResultCache, get_written_tables
+from django_snowflake.cursor import CachingCursor
+
+from .fake_connector import FakeConnection
+
+
+class WrittenTablesTests(TestCase):
+    def test_swap(self):
+        self.assertEqual(get_written_tables('ALTER TABLE "A" SWAP WITH b'), {'"A"', '"B"'})
+
+    def test_no_writes(self):
+        for sql in (
+            'REMOVE @%"T"/bulk_insert_1.csv.gz',
+            'LIST @%"T"',
+            'ALTER WAREHOUSE "W" SET WAREHOUSE_SIZE = %s',
+            "CREATE TEMPORARY FILE FORMAT IF NOT EXISTS F TYPE=CSV",
+        ):
+            with self.subTest(sql=sql):
+                self.assertEqual(get_written_tables(sql), set())
+
+
+class CachingCursorTests(TestCase):
+    def setUp(self):
+        connection.close()
+        patcher = mock.patch('snowflake.connector.connect', side_effect=FakeConnection)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(connection.close)
+        connection.ensure_connection()
+        self.fake = connection.connection
+        self.cache = ResultCache()
+        self.patch_result_cache = mock.patch.object(connection, 'result_cache', self.cache)
+        self.patch_result_cache.start()
+        self.addCleanup(self.patch_result_cache.stop)
+
+    def cursor(self):
+        return CachingCursor(self.fake.cursor(), self.cache, connection)
+
+    def test_key_ignores_query_tag(self):
+        self.cursor().execute('SELECT * FROM "T"')
+        connection.connection_session_parameters['QUERY_TAG'] = 'request'
+        self.cursor().execute('SELECT * FROM "T"')
+        self.assertEqual(self.fake.statements, ['SELECT * FROM "T"'])
+
+    def test_key_includes_warehouse(self):
+        self.cursor().execute('SELECT * FROM "T"')
+        with connection.execution_options(warehouse='reporting'):
+            self.cursor().execute('SELECT * FROM "T"')
+            self.cursor().execute('SELECT * FROM "T"')
+        self.assertEqual(self.fake.statements, ['SELECT * FROM "T"'] * 2)
+
+    def test_invalidated_on_commit(self):
+        with transaction.atomic():
+            self.cursor().execute('INSERT INTO "T" VALUES (1)')
+            # Before the commit, another session reads (and this process
+            # caches) the old rows.
+            self.cache.set('key', {'"T"'}, None, [])
+        self.assertEqual(self.cache.stats()['entries'], 0)
+        self.assertEqual(connection.uncommitted_written_tables, set())
+
+    def test_rollback(self):
+        with transaction.atomic():
+            self.cursor().execute('INSERT INTO "T" VALUES (1)')
+            transaction.set_rollback(True)
+        self.assertEqual(connection.uncommitted_written_tables, set())
@@ -0,0 +1,39 @@
+from unittest import TestCase, mock
+
+from django.core.management.color import no_style
+from django.db import connection
+
+from .fake_connector import FakeConnection
+
+
+class SnapshotTests(TestCase):
+    def setUp(self):
+        connection.close()
+        patcher = mock.patch('snowflake.connector.connect', side_effect=FakeConnection)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(connection.close)
+        self.addCleanup(setattr, connection.creation, 'snapshot_tables', None)
+        connection.ensure_connection()
+        self.fake = connection.connection
+        self.fake.results['SHOW TERSE TABLES'] = [(None, 'TESTS_ITEM'), (None, 'OTHER')]
+
+    def test_create_snapshot(self):
+        connection.creation.create_snapshot()
+        # The snapshot's tables are emptied like a flush would.
+        self.assertEqual(self.fake.statements[-3:], [
+            'CREATE OR REPLACE SCHEMA "PUBLIC_SNAPSHOT" CLONE "PUBLIC"',
+            'TRUNCATE TABLE "PUBLIC_SNAPSHOT"."TESTS_ITEM"',
+            'USE SCHEMA "PUBLIC"',
+        ])
+        self.assertEqual(connection.creation.snapshot_tables, {'"TESTS_ITEM"'})
+
+    def test_flush_restores_snapshot(self):
+        connection.creation.create_snapshot()
+        self.fake.statements.clear()
+        sql_list = connection.ops.sql_flush(no_style(), ['tests_item'])
+        connection.ops.execute_sql_flush(sql_list)
+        self.assertEqual(self.fake.statements, [
+            'CREATE OR REPLACE SCHEMA "PUBLIC" CLONE "PUBLIC_SNAPSHOT"',
+            'USE SCHEMA "PUBLIC"',
+        ])
@@ -0,0 +1,28 @@
+from unittest import TestCase
+
+from django_snowflake.cursor import PrefetchingCursor
+
+from .fake_connector import FakeConnection
+
+
+class PrefetchingCursorTests(TestCase):
+    def setUp(self):
+        self.fake = FakeConnection()
+        self.fake.results['SELECT "ID" FROM "TESTS_ITEM"'] = [(i,) for i in range(10)]
+        self.cursor = PrefetchingCursor(self.fake.cursor(), prefetch_chunks=1)
+        self.addCleanup(self.cursor.close)
+
+    def test_execute_stops_prefetching(self):
+        self.cursor.execute('SELECT "ID" FROM "TESTS_ITEM"')
+        self.assertEqual(self.cursor.fetchmany(2), [(0,), (1,)])
+        self.cursor.execute('SELECT 1')
+        self.assertIsNone(self.cursor.thread)
+
+    def test_executemany_stops_prefetching(self):
+        self.cursor.execute('SELECT "ID" FROM "TESTS_ITEM"')
+        self.assertEqual(self.cursor.fetchmany(2), [(0,), (1,)])
+        stopped = self.cursor.stopped
+        self.assertIs(self.cursor.executemany('DELETE FROM "TESTS_ITEM" WHERE "ID" = %s', [(1,), (2,)]), self.cursor)
+        self.assertIs(stopped.is_set(), True)
+        self.assertIsNone(self.cursor.thread)
+        self.assertEqual(self.fake.statements[-2:], ['DELETE FROM "TESTS_ITEM" WHERE "ID" = %s'] * 2)
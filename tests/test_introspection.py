@@ -0,0 +1,35 @@
+from unittest import TestCase, mock
+
+from django.db import connection
+from django.db.backends.base.introspection import TableInfo
+
+from .fake_connector import FakeConnection
+from .models import Item
+
+
+class TableListTests(TestCase):
+    def setUp(self):
+        connection.close()
+        patcher = mock.patch('snowflake.connector.connect', side_effect=FakeConnection)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(connection.close)
+        connection.ensure_connection()
+        self.fake = connection.connection
+        # SHOW TABLES includes dynamic tables and SHOW VIEWS includes
+        # materialized views.
+        self.fake.results['SHOW TERSE TABLES'] = [(None, 'TESTS_ITEM'), (None, 'DYNAMIC')]
+        self.fake.results['SHOW TERSE VIEWS'] = [(None, 'MATERIALIZED')]
+
+    def test_get_table_list(self):
+        with connection.cursor() as cursor:
+            self.assertEqual(connection.introspection.get_table_list(cursor), [
+                TableInfo('tests_item', 't'),
+                TableInfo('dynamic', 't'),
+                TableInfo('materialized', 'v'),
+            ])
+
+    def test_snowflake_object_not_flushed(self):
+        self.assertEqual(connection.introspection.django_table_names(only_existing=True), ['tests_item'])
+        with mock.patch.object(Item._meta, 'snowflake_object', mock.sentinel.dynamic_table, create=True):
+            self.assertEqual(connection.introspection.django_table_names(only_existing=True), [])
@@ -0,0 +1,135 @@
+from unittest import TestCase, mock
+
+from django.db import ProgrammingError, connection, models
+
+from django_snowflake.indexes import ClusterBy
+from django_snowflake.sequences import PrimaryKeyAllocator
+
+from .fake_connector import FakeConnection
+from .models import Item
+
+
+def describe_row(name, default=None):
+    # name, type, kind, null?, default, primary key, unique key, check,
+    # expression, comment, policy name
+    return (name, 'NUMBER(38,0)', 'COLUMN', 'N', default, 'Y', 'N', None, None, None, None)
+
+
+class SequenceTests(TestCase):
+    """AutoFields backed by sequences with 'PK_ALLOCATION_BLOCK_SIZE'."""
+    def setUp(self):
+        connection.close()
+        patcher = mock.patch('snowflake.connector.connect', side_effect=FakeConnection)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(connection.close)
+        patcher = mock.patch.object(connection, 'pk_allocator', PrimaryKeyAllocator(connection, 10))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        connection.ensure_connection()
+        self.fake = connection.connection
+
+    def test_alter_db_table_renames_sequence(self):
+        self.fake.results['DESCRIBE TABLE "NEW_ITEM"'] = [
+            describe_row('ID', '"DJANGO_TESTS"."PUBLIC"."TESTS_ITEM_ID_SEQ".NEXTVAL'),
+        ]
+        with mock.patch.object(Item._meta, 'db_table', 'new_item'), connection.schema_editor() as editor:
+            editor.alter_db_table(Item, 'tests_item', 'new_item')
+        self.assertEqual(self.fake.statements, [
+            'ALTER TABLE "TESTS_ITEM" RENAME TO "NEW_ITEM"',
+            'DESCRIBE TABLE "NEW_ITEM"',
+            'ALTER SEQUENCE "DJANGO_TESTS"."PUBLIC"."TESTS_ITEM_ID_SEQ" RENAME TO "NEW_ITEM_ID_SEQ"',
+            'ALTER TABLE "NEW_ITEM" ALTER COLUMN "ID" SET DEFAULT "NEW_ITEM_ID_SEQ".NEXTVAL',
+        ])
+
+    def test_alter_db_table_autoincrement(self):
+        self.fake.results['DESCRIBE TABLE "NEW_ITEM"'] = [describe_row('ID', 'IDENTITY START 1 INCREMENT 1')]
+        with mock.patch.object(Item._meta, 'db_table', 'new_item'), connection.schema_editor() as editor:
+            editor.alter_db_table(Item, 'tests_item', 'new_item')
+        self.assertEqual(self.fake.statements, [
+            'ALTER TABLE "TESTS_ITEM" RENAME TO "NEW_ITEM"',
+            'DESCRIBE TABLE "NEW_ITEM"',
+        ])
+
+    def test_alter_auto_field_to_integer_field_drops_sequence(self):
+        old_field = Item._meta.pk
+        new_field = models.IntegerField(primary_key=True)
+        new_field.set_attributes_from_name('id')
+        with connection.schema_editor() as editor:
+            editor.alter_field(Item, old_field, new_field, strict=True)
+        self.assertEqual(self.fake.statements[-2:], [
+            'ALTER TABLE "TESTS_ITEM" ALTER COLUMN "ID" DROP DEFAULT',
+            'DROP SEQUENCE IF EXISTS "TESTS_ITEM_ID_SEQ"',
+        ])
+
+    def test_rename_auto_field_column_renames_sequence(self):
+        self.fake.results['DESCRIBE TABLE "TESTS_ITEM"'] = [describe_row('ITEM_ID', '"TESTS_ITEM_ID_SEQ".NEXTVAL')]
+        old_field = Item._meta.pk
+        new_field = models.AutoField(primary_key=True, db_column='item_id')
+        new_field.set_attributes_from_name('id')
+        with connection.schema_editor() as editor:
+            editor.alter_field(Item, old_field, new_field, strict=True)
+        self.assertEqual(self.fake.statements[-3:], [
+            'DESCRIBE TABLE "TESTS_ITEM"',
+            'ALTER SEQUENCE "TESTS_ITEM_ID_SEQ" RENAME TO "TESTS_ITEM_ITEM_ID_SEQ"',
+            'ALTER TABLE "TESTS_ITEM" ALTER COLUMN "ITEM_ID" SET DEFAULT "TESTS_ITEM_ITEM_ID_SEQ".NEXTVAL',
+        ])
+
+
+class DDLBatchTests(TestCase):
+    def setUp(self):
+        connection.close()
+        patcher = mock.patch('snowflake.connector.connect', side_effect=FakeConnection)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(connection.close)
+        patcher = mock.patch.dict(connection.settings_dict, {'DDL_BATCH_SIZE': 10})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        connection.ensure_connection()
+        self.fake = connection.connection
+
+    def test_failed_batch(self):
+        self.fake.errors['CREATE TABLE "A"'] = 'SQL compilation error.'
+        with self.assertRaises(ProgrammingError) as cm:
+            with connection.schema_editor() as editor:
+                editor.execute('CREATE TABLE "A" ("X" NUMBER)')
+                editor.execute('CREATE TABLE "B" ("X" NUMBER)')
+        self.assertEqual(str(cm.exception).split('\n')[-3:], [
+            'The statement that failed is in this batch:',
+            '1. CREATE TABLE "A" ("X" NUMBER); (params ())',
+            '2. CREATE TABLE "B" ("X" NUMBER); (params ())',
+        ])
+        # The connector's error is kept.
+        self.assertEqual(cm.exception.__cause__.errno, 1003)
+
+
+class ConstraintNamesTests(TestCase):
+    def setUp(self):
+        connection.close()
+        patcher = mock.patch('snowflake.connector.connect', side_effect=FakeConnection)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(connection.close)
+        connection.ensure_connection()
+        self.fake = connection.connection
+
+    def test_table_options_not_introspected(self):
+        with connection.schema_editor() as editor:
+            editor._constraint_names(Item, ['name'], unique=True)
+        self.assertEqual(self.fake.statements, [
+            'SHOW IMPORTED KEYS IN TABLE "TESTS_ITEM"',
+            'SHOW PRIMARY KEYS IN TABLE "TESTS_ITEM"',
+            'SHOW UNIQUE KEYS IN TABLE "TESTS_ITEM"',
+        ])
+
+    def test_table_options_introspected(self):
+        self.fake.results["SHOW TABLES LIKE 'TESTS_ITEM'"] = [
+            (None, 'TESTS_ITEM', None, None, 'TABLE', None, 'LINEAR(NAME)'),
+        ]
+        indexes = [ClusterBy(fields=['name'], name='tests_item_cluster')]
+        with mock.patch.object(Item._meta, 'indexes', indexes), connection.schema_editor() as editor:
+            names = editor._constraint_names(Item, ['name'], index=True)
+        self.assertEqual(names, ['cluster_by'])
+        self.assertEqual(self.fake.statements[-1], "SHOW TABLES LIKE 'TESTS_ITEM'")
+        self.assertIs(connection.introspection.include_table_options, True)
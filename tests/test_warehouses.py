@@ -0,0 +1,44 @@
+from unittest import TestCase, mock
+
+from django.db import connection
+
+from django_snowflake.warehouses import warehouse_size
+
+from .fake_connector import FakeConnection
+
+SHOW_WAREHOUSES = 'SHOW WAREHOUSES LIKE %s'
+
+
+class WarehouseSizeTests(TestCase):
+    def setUp(self):
+        connection.close()
+        patcher = mock.patch('snowflake.connector.connect', side_effect=FakeConnection)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(connection.close)
+        connection.ensure_connection()
+        self.fake = connection.connection
+
+    def test_lowercase_name(self):
+        # SHOW WAREHOUSES returns the upper-cased identifier.
+        self.fake.results[SHOW_WAREHOUSES] = [('REPORTING_WH', 'STARTED', 'STANDARD', 'X-Small')]
+        with warehouse_size('LARGE', 'reporting'):
+            pass
+        self.assertEqual(self.fake.statements, [
+            SHOW_WAREHOUSES,
+            'ALTER WAREHOUSE "REPORTING_WH" SET WAREHOUSE_SIZE = %s WAIT_FOR_COMPLETION = TRUE',
+            'ALTER WAREHOUSE "REPORTING_WH" SET WAREHOUSE_SIZE = %s',
+        ])
+        self.assertEqual(self.fake.params, [['REPORTING_WH'], ['LARGE'], ['XSMALL']])
+
+    def test_same_size(self):
+        self.fake.results[SHOW_WAREHOUSES] = [('REPORTING_WH', 'STARTED', 'STANDARD', '4X-Large')]
+        with warehouse_size('x4large', 'reporting'):
+            pass
+        self.assertEqual(self.fake.statements, [SHOW_WAREHOUSES])
+
+    def test_missing_warehouse(self):
+        msg = "Warehouse 'reporting_wh' does not exist or is not visible to the role."
+        with self.assertRaisesRegex(ValueError, '^%s$' % msg.replace('.', r'\.')):
+            with warehouse_size('LARGE', 'reporting'):
+                pass